@@ -0,0 +1,139 @@
+"""Local gameplay analytics written as rotating JSONL files.
+
+The game thread only appends small tuples to an in-memory batch; full
+batches are handed to a writer thread that serializes them and appends them
+to analytics/events.jsonl, rotating to events.1.jsonl, events.2.jsonl, ...
+once the file gets big. Both sides are bounded: at most MAX_EVENTS_PER_FRAME
+events are taken per frame, and if the disk falls behind by more than
+MAX_PENDING_BATCHES batches new ones are dropped (and counted) instead of
+piling up in memory.
+
+Where threads aren't available (asyncio hosts, browser builds) set
+threaded = False and call drain() from a background task instead.
+"""
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Optional
+
+BATCH_SIZE = 64  # Events per hand-off to the writer thread
+FLUSH_INTERVAL = 2.0  # Seconds before a partial batch is handed off anyway
+MAX_PENDING_BATCHES = 32  # Batches waiting for the disk before we drop
+MAX_EVENTS_PER_FRAME = 16
+MAX_FILE_BYTES = 1 << 20
+BACKUP_COUNT = 5  # Rotated files kept next to the current one
+
+
+class Analytics:
+    """Event stream for one play session; does nothing when directory is None"""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = MAX_FILE_BYTES,
+                 backup_count: int = BACKUP_COUNT):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.session = uuid.uuid4().hex[:12]
+        self.batch = []
+        self.batch_started = 0.0
+        self.frame_events = 0
+        self.dropped = 0  # Events lost to the per-frame cap or a slow disk
+        self.reported_dropped = 0
+        self.batches = queue.Queue(maxsize=MAX_PENDING_BATCHES)
+        self.enabled = directory is not None
+        self.threaded = True  # Start a writer thread on the first flush
+        self.thread = None
+
+    def track(self, event: str, **fields) -> None:
+        """Record an event; cheap enough to call from the game loop"""
+        if not self.enabled:
+            return
+        if self.frame_events >= MAX_EVENTS_PER_FRAME:
+            self.dropped += 1
+            return
+        self.frame_events += 1
+        now = time.time()
+        if not self.batch:
+            self.batch_started = now
+        self.batch.append((now, event, fields))
+        if len(self.batch) >= BATCH_SIZE:
+            self.flush()
+
+    def end_frame(self) -> None:
+        """Reset the per-frame cap and hand off a batch that has waited too long"""
+        self.frame_events = 0
+        if self.batch and time.time() - self.batch_started > FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        """Pass the current batch to the writer without waiting on it"""
+        if self.dropped != self.reported_dropped:
+            self.batch.append((time.time(), 'dropped', {'count': self.dropped - self.reported_dropped}))
+            self.reported_dropped = self.dropped
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        try:
+            self.batches.put_nowait(batch)
+        except queue.Full:
+            self.dropped += len(batch)
+        if self.threaded and self.thread is None:
+            self.thread = threading.Thread(target=self._writer, name='analytics', daemon=True)
+            self.thread.start()
+
+    def drain(self) -> None:
+        """Write every waiting batch now, for callers that don't use the thread"""
+        while True:
+            try:
+                batch = self.batches.get_nowait()
+            except queue.Empty:
+                return
+            if batch is not None:
+                self._write(batch)
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Flush what's left and wait (briefly) for the writer to finish"""
+        if not self.enabled:
+            return
+        self.flush()
+        self.enabled = False
+        if self.thread is None:
+            self.drain()
+            return
+        try:
+            self.batches.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(timeout)
+        self.thread = None
+
+    def _path(self, index: int = 0) -> str:
+        name = 'events.jsonl' if index == 0 else f'events.{index}.jsonl'
+        return os.path.join(self.directory, name)
+
+    def _rotate(self) -> None:
+        for index in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(self._path(index)):
+                os.replace(self._path(index), self._path(index + 1))
+        os.replace(self._path(), self._path(1))
+
+    def _write(self, batch) -> None:
+        lines = ''.join(json.dumps({'t': round(t, 3), 'session': self.session, 'event': event, **fields})
+                        + '\n' for t, event, fields in batch)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if os.path.exists(self._path()) and os.path.getsize(self._path()) + len(lines) > self.max_bytes:
+                self._rotate()
+            with open(self._path(), 'a', encoding='utf-8') as f:
+                f.write(lines)
+        except OSError as e:
+            print(f"Analytics write failed: {e}")
+
+    def _writer(self) -> None:
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                return
+            self._write(batch)
@@ -0,0 +1,241 @@
+"""Pre-rendered asset pack: every sprite variant and common text in one mmap'd file.
+
+    python assets.py                 # build assets.pack
+    python assets.py --check         # compare the pack with what the game draws now
+
+The build draws every sprite the game can ask for (player, gem and every
+NPC type/state/progress combination). A bot then plays through all four
+choices and records every string the game renders. Everything goes into one
+file: a JSON index followed by the raw BGRA pixels, which is the layout of the
+game's SRCALPHA surfaces. At startup the game maps the file with mmap and
+builds each Surface with pygame.image.frombuffer straight over the mapped
+bytes. Nothing is drawn or rasterized, and several game instances on one
+machine share the same pages.
+
+The index records ASSET_VERSION and the pygame version; a pack built with
+anything else is ignored (with a note) and the game draws everything itself.
+Nothing is read from the game's source, so this works the same in frozen
+builds. Bump ASSET_VERSION when the game's sprite drawing changes; --check
+catches a forgotten bump, since it compares the pack pixel for pixel. Text
+needs no bump: a changed string simply isn't found in the pack and is
+rendered at runtime.
+"""
+import argparse
+import contextlib
+import json
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+MAGIC = b'EOHPACK1'
+ALIGN = 64  # Start every image on a cache-line boundary
+PIXEL_FORMAT = 'BGRA'  # Matches pygame's SRCALPHA masks, so blits need no conversion
+NPC_TYPES = ('elder', 'child', 'stranger')
+ASSET_VERSION = 1  # Bump when Player, Resource or NPC sprites are drawn differently
+
+
+def pack_version() -> str:
+    """What a pack must have been built with to be used; others are stale"""
+    # Text comes from pygame's font rasterizer, so its version counts too
+    return f"{ASSET_VERSION}/pygame {pygame.version.ver}"
+
+
+class AssetPack:
+    """A memory-mapped pack; sprites and texts are Surfaces over the mapped bytes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            # Copy-on-write: pages stay shared unless something draws on a sprite
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        if self.map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an asset pack")
+        index_size, = struct.unpack_from('<I', self.map, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.index = json.loads(self.map[start:start + index_size])
+        self.stale = self.index.get('version') != pack_version()
+        view = memoryview(self.map)
+        self.sprites: Dict[object, pygame.Surface] = {}
+        self.texts: List[Tuple[int, str, tuple, pygame.Surface]] = []
+        for entry in self.index['images']:
+            width, height = entry['size']
+            offset = entry['offset']
+            surface = pygame.image.frombuffer(view[offset:offset + width * height * 4], (width, height),
+                                              PIXEL_FORMAT)
+            if entry['kind'] == 'sprite':
+                key = entry['key']
+                self.sprites[tuple(key) if isinstance(key, list) else key] = surface
+            else:
+                self.texts.append((entry['font'], entry['text'], tuple(entry['color']), surface))
+
+    def __len__(self) -> int:
+        return len(self.index['images'])
+
+
+def load_pack(path: Optional[str]) -> Optional[AssetPack]:
+    """Open a pack if there is an up-to-date one; None means draw everything at runtime"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        pack = AssetPack(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring asset pack {path}: {e}")
+        return None
+    if pack.stale:
+        print(f"Asset pack {path} was built for {pack.index.get('version')}, not {pack_version()}; "
+              "drawing sprites at runtime (rebuild it with python assets.py)")
+        return None
+    return pack
+
+
+def sprite_variants():
+    """Every sprite the game can ask for, as (SPRITE_CACHE key, surface)"""
+    from the_game import NPC, Player, Resource, SPRITE_CACHE
+
+    SPRITE_CACHE.clear()
+    Player(0, 0)
+    Resource(0, 0)
+    for npc_type in NPC_TYPES:
+        for required in (4, 5):  # 5 once revived
+            for given in range(required + 1):
+                for dead in (False, True):
+                    for helped in (False, True):
+                        for needs_help in (False, True):
+                            npc = NPC(0, 0, needs_help, npc_type)
+                            npc.dead, npc.helped = dead, helped
+                            npc.gems_given, npc.gems_required = given, required
+                            npc.update_sprite()
+    return list(SPRITE_CACHE.items())
+
+
+def played_texts(game, playthroughs: int):
+    """Every (font size, text, color) rendered while a bot plays through each choice"""
+    from soak import Bot
+    from the_game import WHITE
+
+    sizes = {}
+    seen = {}
+    messages = []
+    text_surface = game.renderer.text_surface
+
+    def recording(font, text, color):
+        surface = text_surface(font, text, color)
+        if font not in sizes:
+            sizes[font] = next(size for size, f in game.fonts.items() if f is font)
+        seen.setdefault((sizes[font], text, tuple(color)), surface)
+        return surface
+
+    def show_message(text, duration=60):
+        messages.append(text)
+        show(text, duration)
+
+    # The bot moves on before most messages reach the front of the queue
+    show = game.show_message
+    game.show_message = show_message
+    game.renderer.text_surface = recording
+    bot = Bot(game)
+    try:
+        for _ in range(playthroughs):
+            bot.playthrough()
+        bot.frame(1)  # The intro after the last restart
+        for text in messages:
+            recording(game.font, text, WHITE)
+        # Every label an NPC can show
+        for npc_type in NPC_TYPES:
+            name = npc_type.capitalize()
+            recording(game.font, name, WHITE)
+            recording(game.font, f"{name} (Complete!)", WHITE)
+            for required in (4, 5):
+                for given in range(required + 1):
+                    recording(game.font, f"{name} ({given}/{required})", WHITE)
+    finally:
+        del game.renderer.text_surface
+        del game.show_message
+    return list(seen.items())
+
+
+def build(path: str, playthroughs: int = 8) -> dict:
+    """Render everything and write the pack; returns some stats"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    from the_game import Game
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        game = Game(audio=False, asset_pack=None)
+        texts = played_texts(game, playthroughs)
+        sprites = sprite_variants()
+
+    entries, blobs = [], []
+    for key, surface in sprites:
+        entries.append({'kind': 'sprite', 'key': key, 'size': surface.get_size()})
+        blobs.append(pygame.image.tobytes(surface, PIXEL_FORMAT))
+    for (size, text, color), surface in texts:
+        if surface.get_flags() & pygame.SRCALPHA and surface.get_bytesize() == 4:
+            entries.append({'kind': 'text', 'font': size, 'text': text, 'color': color,
+                            'size': surface.get_size()})
+            blobs.append(pygame.image.tobytes(surface, PIXEL_FORMAT))
+
+    # Offsets depend on the index size, which depends on the offsets; two passes settle it
+    index = {'version': pack_version(), 'format': PIXEL_FORMAT, 'images': entries}
+    for _ in range(2):
+        header = json.dumps(index, separators=(',', ':')).encode()
+        offset = len(MAGIC) + 4 + len(header)
+        for entry, blob in zip(entries, blobs):
+            offset += -offset % ALIGN
+            entry['offset'] = offset
+            offset += len(blob)
+    header = json.dumps(index, separators=(',', ':')).encode()
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', len(header)) + header)
+        for entry, blob in zip(entries, blobs):
+            f.write(b'\0' * (entry['offset'] - f.tell()))
+            f.write(blob)
+    os.replace(path + '.tmp', path)
+    return {'sprites': len(sprites), 'texts': len(entries) - len(sprites), 'bytes': os.path.getsize(path)}
+
+
+def check(path: str) -> bool:
+    """Every packed sprite and text matches what the game draws today"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from the_game import Game
+
+    try:
+        pack = AssetPack(path)
+    except FileNotFoundError:
+        print(f"No asset pack at {path}; build one with python assets.py")
+        return False
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        game = Game(audio=False, asset_pack=None)
+        drawn = dict(sprite_variants())
+    different = [key for key, surface in pack.sprites.items()
+                 if pygame.image.tobytes(surface, PIXEL_FORMAT) != pygame.image.tobytes(drawn[key], PIXEL_FORMAT)]
+    different += [text for size, text, color, surface in pack.texts
+                  if pygame.image.tobytes(surface, PIXEL_FORMAT) !=
+                  pygame.image.tobytes(game.get_font(size).render(text, True, color), PIXEL_FORMAT)]
+    print(f"{len(pack.sprites)} sprites, {len(pack.texts)} texts; "
+          f"{'stale' if pack.stale else 'up to date'}; {len(different)} differ from what the game draws")
+    return not different and not pack.stale
+
+
+def main():
+    from the_game import ASSET_PACK
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default=ASSET_PACK)
+    parser.add_argument('--playthroughs', type=int, default=8,
+                        help="Bot runs used to collect text (they cycle through the four choices)")
+    parser.add_argument('--check', action='store_true', help="Verify an existing pack instead of building")
+    args = parser.parse_args()
+    if args.check:
+        raise SystemExit(0 if check(args.output) else 1)
+    stats = build(args.output, args.playthroughs)
+    print(f"Wrote {args.output}: {stats['sprites']} sprites, {stats['texts']} texts, {stats['bytes'] / 1024:.0f} KiB")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""Procedurally synthesized sound effects.
+
+Every effect is built once at startup from NumPy sample buffers, turned into
+a pygame Sound with sndarray and kept for the whole run. Playing an effect
+during a frame is a dict lookup plus Channel.play() on a preallocated
+channel pool, so it never allocates sample data or waits on the mixer.
+Without an audio device the game simply runs silent.
+"""
+from typing import Callable, Dict
+
+import numpy as np
+import pygame
+
+import startup
+
+SAMPLE_RATE = 22050
+BUFFER_SIZE = 512  # Samples per mixer callback; small keeps latency low
+CHANNELS = 8  # Effects that can overlap before one is cut off
+VOLUME = 0.5
+
+# Sample dtype for each mixer format reported by pygame.mixer.get_init()
+SAMPLE_TYPES = {8: np.uint8, -8: np.int8, 16: np.uint16, -16: np.int16, 32: np.float32}
+
+
+def _seconds(duration: float) -> np.ndarray:
+    return np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+
+
+def _sweep(start_hz: float, end_hz: float, duration: float) -> np.ndarray:
+    """Sine wave gliding from start_hz to end_hz"""
+    freq = np.linspace(start_hz, end_hz, int(duration * SAMPLE_RATE))
+    return np.sin(2 * np.pi * np.cumsum(freq) / SAMPLE_RATE)
+
+
+def _decay(wave: np.ndarray, rate: float, attack: float = 0.005) -> np.ndarray:
+    """Short linear attack followed by an exponential decay (clickless edges)"""
+    t = np.arange(len(wave)) / SAMPLE_RATE
+    envelope = np.exp(-t * rate) * np.minimum(t / attack, 1.0)
+    return wave * envelope
+
+
+def _notes(freqs, spacing: float, duration: float, rate: float) -> np.ndarray:
+    """Bell-like notes starting spacing seconds apart, mixed together"""
+    out = np.zeros(int((spacing * (len(freqs) - 1) + duration) * SAMPLE_RATE))
+    t = _seconds(duration)
+    for i, freq in enumerate(freqs):
+        note = np.sin(2 * np.pi * freq * t) + 0.3 * np.sin(4 * np.pi * freq * t)
+        start = int(i * spacing * SAMPLE_RATE)
+        out[start:start + len(t)] += _decay(note, rate)
+    return out
+
+
+def gem_pickup() -> np.ndarray:
+    chirp = _decay(_sweep(880, 1760, 0.2), 25)
+    return chirp + 0.5 * _notes([1760], 0, 0.2, 20)
+
+
+def gem_given() -> np.ndarray:
+    return _notes([660, 990], 0.07, 0.3, 14)
+
+
+def npc_death() -> np.ndarray:
+    wave = _sweep(440, 110, 0.8)
+    tremolo = 0.6 + 0.4 * np.sin(2 * np.pi * 7 * _seconds(0.8))
+    return _decay(wave * tremolo, 3)
+
+
+def npc_revival() -> np.ndarray:
+    return _notes([440, 554, 659, 880], 0.09, 0.4, 8)
+
+
+def wrong_exit() -> np.ndarray:
+    # Two low square-wave buzzes
+    t = _seconds(0.12)
+    buzz = _decay(np.sign(np.sin(2 * np.pi * 110 * t)), 12)
+    gap = np.zeros(int(0.05 * SAMPLE_RATE))
+    return 0.5 * np.concatenate([buzz, gap, buzz])
+
+
+def enlightenment() -> np.ndarray:
+    return _notes([523, 659, 784, 1047, 1319], 0.12, 1.6, 2.5)
+
+
+EFFECTS: Dict[str, Callable[[], np.ndarray]] = {
+    'gem_pickup': gem_pickup,
+    'gem_given': gem_given,
+    'npc_death': npc_death,
+    'npc_revival': npc_revival,
+    'wrong_exit': wrong_exit,
+    'enlightenment': enlightenment,
+}
+
+
+def make_sound(wave: np.ndarray) -> pygame.mixer.Sound:
+    """Convert a mono float wave in [-1, 1] to a Sound in the mixer's format"""
+    _, fmt, channels = pygame.mixer.get_init()
+    wave = np.clip(wave / max(1.0, np.abs(wave).max()), -1.0, 1.0)
+    dtype = SAMPLE_TYPES[fmt]
+    if dtype is np.float32:
+        samples = wave.astype(np.float32)
+    else:
+        info = np.iinfo(dtype)
+        half = (int(info.max) - int(info.min)) / 2
+        samples = (wave * (half - 1) + (int(info.min) + half)).astype(dtype)
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1)
+    return pygame.sndarray.make_sound(np.ascontiguousarray(samples))
+
+
+class Audio:
+    """Preloaded effects played on a fixed pool of mixer channels"""
+
+    def __init__(self, enabled: bool = True):
+        self.sounds: Dict[str, pygame.mixer.Sound] = {}
+        self.channels = []
+        self.next_channel = 0
+        if not enabled:
+            return
+        try:
+            pygame.mixer.pre_init(SAMPLE_RATE, -16, 2, BUFFER_SIZE)
+            startup.require('mixer')
+        except pygame.error as e:
+            print(f"Audio disabled: {e}")
+            return
+
+        pygame.mixer.set_num_channels(CHANNELS)
+        self.channels = [pygame.mixer.Channel(i) for i in range(CHANNELS)]
+        for name, synthesize in EFFECTS.items():
+            sound = make_sound(synthesize())
+            sound.set_volume(VOLUME)
+            self.sounds[name] = sound
+        startup.report.mark('sounds synthesized')
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sounds)
+
+    def play(self, name: str) -> None:
+        """Start an effect on a free channel, or cut one off if all are busy"""
+        sound = self.sounds.get(name)
+        if sound is None:
+            return
+        channels = self.channels
+        count = len(channels)
+        for i in range(count):
+            index = (self.next_channel + i) % count
+            if not channels[index].get_busy():
+                break
+        else:
+            # All busy: steal the next channel in rotation
+            index = self.next_channel
+        channels[index].play(sound)
+        self.next_channel = (index + 1) % count
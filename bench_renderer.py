@@ -0,0 +1,78 @@
+"""Compare frame times of the software and texture renderers.
+
+Each backend runs in its own process so they never share a window:
+
+    python bench_renderer.py --frames 600
+    SDL_VIDEODRIVER=dummy python bench_renderer.py   # headless, SDL software renderer
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from renderer import RENDERERS
+
+
+def bench_backend(name: str, frames: int) -> dict:
+    """Draw the busiest scene (riverbank with enlightenment) for a number of frames"""
+    from the_game import Game, GameState, SCREEN_WIDTH, SCREEN_HEIGHT
+    import pygame
+
+    game = Game(renderer=name)
+    # Zone 1 creates the NPCs the riverbank expects
+    game.state = GameState.ZONE_SCARCITY
+    game.setup_zones()
+    game.state = GameState.ZONE_RIVERBANK
+    game.setup_zones()
+    game.enlightenment_rect = pygame.Rect(SCREEN_WIDTH - 150, SCREEN_HEIGHT - 150, 100, 100)
+
+    # Warm up caches (text surfaces, textures) before timing
+    for _ in range(10):
+        game.draw()
+        game.renderer.present()
+
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        game.draw()
+        game.renderer.present()
+        times.append(time.perf_counter() - start)
+
+    times.sort()
+    return {
+        'renderer': game.renderer.name,
+        'frames': frames,
+        'mean_ms': 1000 * sum(times) / len(times),
+        'p50_ms': 1000 * times[len(times) // 2],
+        'p95_ms': 1000 * times[int(len(times) * 0.95)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--backend', choices=RENDERERS, help="Run a single backend in this process")
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(bench_backend(args.backend, args.frames)))
+        return
+
+    results = []
+    for name in RENDERERS:
+        out = subprocess.run([sys.executable, __file__, '--backend', name, '--frames', str(args.frames)],
+                             capture_output=True, text=True)
+        lines = [line for line in out.stdout.splitlines() if line.startswith('{')]
+        if out.returncode != 0 or not lines:
+            print(f"{name}: failed\n{out.stderr}")
+            continue
+        results.append((name, json.loads(lines[-1])))
+
+    print(f"{'backend':<14}{'actual':<14}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, r in results:
+        print(f"{name:<14}{r['renderer']:<14}{r['mean_ms']:>10.3f}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
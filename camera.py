@@ -0,0 +1,108 @@
+"""Camera, spatial index and lazily baked tiles for zones bigger than the screen.
+
+Zones are laid out in world coordinates. Each frame the camera follows the
+player, static layers are drawn from baked tiles that intersect the
+viewport, and only dynamic objects inside the viewport are drawn at all.
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+import pygame
+
+TILE_SIZE = 256  # Pixels per baked static tile
+TILE_CACHE_SIZE = 48  # Tiles kept baked; a screen needs about 16
+GRID_CELL = 128  # Bucket size of the spatial grid
+
+
+class SpatialGrid:
+    """Uniform-grid index of rects for fast "what's near here" queries"""
+
+    def __init__(self, cell_size: int = GRID_CELL):
+        self.cell_size = cell_size
+        self.buckets: Dict[Tuple[int, int], List[int]] = {}
+        self.items = []
+        self.rects = []
+
+    def _cells(self, rect: pygame.Rect):
+        size = self.cell_size
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield (cx, cy)
+
+    def insert(self, rect: pygame.Rect, item=None) -> None:
+        index = len(self.items)
+        self.items.append(rect if item is None else item)
+        self.rects.append(rect)
+        for cell in self._cells(rect):
+            self.buckets.setdefault(cell, []).append(index)
+
+    def query(self, rect: pygame.Rect) -> list:
+        """Items whose rects intersect rect, in insertion order"""
+        found = set()
+        for cell in self._cells(rect):
+            found.update(self.buckets.get(cell, ()))
+        rects = self.rects
+        return [self.items[i] for i in sorted(found) if rects[i].colliderect(rect)]
+
+
+class Camera:
+    """Viewport into the world that follows a target"""
+
+    def __init__(self, viewport_size: Tuple[int, int]):
+        self.viewport = pygame.Rect((0, 0), viewport_size)
+        self.world = pygame.Rect((0, 0), viewport_size)
+
+    @property
+    def offset(self) -> Tuple[int, int]:
+        return self.viewport.topleft
+
+    def set_world(self, world: pygame.Rect) -> None:
+        self.world = pygame.Rect(world)
+        self.viewport.topleft = self.world.topleft
+
+    def follow(self, target: pygame.Rect) -> None:
+        """Center on the target without showing anything outside the world"""
+        self.viewport.center = target.center
+        self.viewport.clamp_ip(self.world)
+
+    def to_world(self, screen_pos: Tuple[int, int]) -> Tuple[int, int]:
+        """World position under a point on the screen (e.g. a mouse click)"""
+        return (screen_pos[0] + self.viewport.x, screen_pos[1] + self.viewport.y)
+
+
+class TileCache:
+    """Static layers cut into TILE_SIZE tiles, baked on first sight.
+
+    bake(surface, tile_rect) draws everything inside tile_rect onto a
+    tile-sized surface. The least recently drawn tiles are dropped once more
+    than capacity are baked.
+    """
+
+    def __init__(self, bake: Callable[[pygame.Surface, pygame.Rect], None],
+                 tile_size: int = TILE_SIZE, capacity: int = TILE_CACHE_SIZE):
+        self.bake = bake
+        self.tile_size = tile_size
+        self.capacity = capacity
+        self.tiles = OrderedDict()
+        self.baked = 0  # Total bakes, to see how often tiles are rebuilt
+
+    def clear(self) -> None:
+        self.tiles.clear()
+
+    def visible(self, viewport: pygame.Rect):
+        """Yield (surface, world position) for every tile touching the viewport"""
+        size = self.tile_size
+        for ty in range(viewport.top // size, (viewport.bottom - 1) // size + 1):
+            for tx in range(viewport.left // size, (viewport.right - 1) // size + 1):
+                key = (tx, ty)
+                surface = self.tiles.get(key)
+                if surface is None:
+                    surface = pygame.Surface((size, size))
+                    self.bake(surface, pygame.Rect(tx * size, ty * size, size, size))
+                    self.tiles[key] = surface
+                    self.baked += 1
+                    if len(self.tiles) > self.capacity:
+                        self.tiles.popitem(last=False)
+                else:
+                    self.tiles.move_to_end(key)
+                yield surface, (tx * size, ty * size)
@@ -0,0 +1,103 @@
+"""Batched crowd of wandering needy NPCs for the riverbank.
+
+Positions and velocities live in NumPy arrays and every step (wandering,
+wall bounces, "who is near the player") is a handful of array operations
+over the whole crowd, so hundreds of NPCs cost about as much as a few.
+Each member still has an NPC object holding its gem state, so help_npc()
+works on whichever one the player is standing next to.
+"""
+from typing import Callable, List, Optional
+
+import numpy as np
+import pygame
+
+NPC_SIZE = 32
+WANDER_SPEED = 0.6  # Pixels per frame
+TURN_CHANCE = 0.02  # Chance per frame that an NPC picks a new heading
+HELP_DISTANCE = 50  # Same reach as the main NPCs in Game.update
+
+
+class Crowd:
+    def __init__(self, count: int, bounds: pygame.Rect, walls: List[pygame.Rect],
+                 make_npc: Callable[[int, int], object], seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.bounds = np.array([bounds.left, bounds.top, bounds.right - NPC_SIZE, bounds.bottom - NPC_SIZE],
+                               dtype=np.float32)
+        # Walls as (x0, y0, x1, y1) rows
+        self.walls = np.array([(w.left, w.top, w.right, w.bottom) for w in walls] or np.zeros((0, 4)),
+                              dtype=np.float32).reshape(-1, 4)
+        self.pos = self._free_positions(count)
+        self.vel = np.zeros((count, 2), dtype=np.float32)
+        self.moving = np.ones(count, dtype=bool)
+        self._turn(np.arange(count))
+        self.npcs = [make_npc(int(x), int(y)) for x, y in self.pos]
+
+    def __len__(self):
+        return len(self.npcs)
+
+    def _hits_wall(self, pos: np.ndarray) -> np.ndarray:
+        """For each position, whether an NPC there would overlap any wall"""
+        if not len(self.walls):
+            return np.zeros(len(pos), dtype=bool)
+        x, y = pos[:, 0:1], pos[:, 1:2]
+        w = self.walls
+        return ((x < w[:, 2]) & (x + NPC_SIZE > w[:, 0]) &
+                (y < w[:, 3]) & (y + NPC_SIZE > w[:, 1])).any(axis=1)
+
+    def _free_positions(self, count: int) -> np.ndarray:
+        """Random positions inside the bounds that don't touch a wall"""
+        pos = np.empty((count, 2), dtype=np.float32)
+        todo = np.arange(count)
+        for _ in range(100):
+            if not len(todo):
+                break
+            pos[todo, 0] = self.rng.uniform(self.bounds[0], self.bounds[2], len(todo))
+            pos[todo, 1] = self.rng.uniform(self.bounds[1], self.bounds[3], len(todo))
+            todo = todo[self._hits_wall(pos[todo])]
+        return pos
+
+    def _turn(self, which: np.ndarray) -> None:
+        angles = self.rng.uniform(0, 2 * np.pi, len(which)).astype(np.float32)
+        self.vel[which, 0] = np.cos(angles) * WANDER_SPEED
+        self.vel[which, 1] = np.sin(angles) * WANDER_SPEED
+
+    def update(self) -> None:
+        """Advance every NPC one frame; NPCs that were helped (or died) stand still"""
+        turning = np.flatnonzero(self.rng.random(len(self.pos)) < TURN_CHANCE)
+        self._turn(turning)
+        vel = self.vel * self.moving[:, None]
+
+        # Move each axis separately and bounce off walls and the zone edge
+        for axis, low, high in ((0, 0, 2), (1, 1, 3)):
+            proposed = self.pos.copy()
+            proposed[:, axis] += vel[:, axis]
+            blocked = (self._hits_wall(proposed) |
+                       (proposed[:, axis] < self.bounds[low]) | (proposed[:, axis] > self.bounds[high]))
+            self.vel[blocked, axis] *= -1
+            self.pos[~blocked, axis] = proposed[~blocked, axis]
+
+    def nearest(self, rect: pygame.Rect) -> Optional[int]:
+        """Index of the closest NPC within helping distance of rect's center"""
+        if not len(self.pos):
+            return None
+        dx = self.pos[:, 0] + NPC_SIZE / 2 - rect.centerx
+        dy = self.pos[:, 1] + NPC_SIZE / 2 - rect.centery
+        close = np.flatnonzero((np.abs(dx) < HELP_DISTANCE) & (np.abs(dy) < HELP_DISTANCE))
+        if not len(close):
+            return None
+        return int(close[np.argmin(dx[close] ** 2 + dy[close] ** 2)])
+
+    def sync(self, index: int):
+        """Copy an NPC's simulated position onto its rect and return it"""
+        npc = self.npcs[index]
+        npc.rect.topleft = (int(self.pos[index, 0]), int(self.pos[index, 1]))
+        self.moving[index] = npc.needs_help and not npc.helped and not npc.dead
+        return npc
+
+    def draw(self, renderer, viewport: pygame.Rect) -> None:
+        """Draw the NPCs inside the viewport in one batch"""
+        x, y = self.pos[:, 0], self.pos[:, 1]
+        visible = np.flatnonzero((x > viewport.left - NPC_SIZE) & (x < viewport.right) &
+                                 (y > viewport.top - NPC_SIZE) & (y < viewport.bottom))
+        npcs = self.npcs
+        renderer.blits([(npcs[i].sprite, (int(x[i]), int(y[i]))) for i in visible])
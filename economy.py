@@ -0,0 +1,224 @@
+"""Explore every gem-economy outcome without playing frame by frame.
+
+    python economy.py
+    python economy.py --seed 3 --states   # also list the states that can't win
+
+The outcome of a run only depends on a few numbers: the Zone 1 choice, the
+gems the player holds, each NPC's dead/helped/gems_given/gems_required and
+how many of the gems in a zone are still lying around. The explorer keys
+states on exactly that. Gems are interchangeable, so only the count
+collected matters. The two NPCs are treated the same by every rule, so
+their states are sorted. Transitions aren't re-implemented here: each one
+restores the state into a headless Game and calls the real rules (the
+choice keys through handle_events, gem pickups through update, help_npc,
+and the enlightenment check in update), so the analysis follows the game
+when the rules change. Results are memoized per state, so each state is
+expanded once.
+"""
+import argparse
+import contextlib
+import os
+import random
+from typing import Dict, List, Optional, Tuple
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+from the_game import Game, GameState
+
+CHOICE_KEYS = {pygame.K_1: 'elder', pygame.K_2: 'child', pygame.K_3: 'both', pygame.K_4: 'neither'}
+VICTORY = 'VICTORY'
+UNREACHABLE = float('inf')
+
+# (zone, choice, gems held, sorted NPC states, zone gems collected)
+State = Tuple[str, Optional[str], int, Tuple[Tuple[bool, bool, int, int], ...], int]
+
+
+class Explorer:
+    """Builds the state graph on demand by running the game's own rules"""
+
+    def __init__(self, game: Game):
+        self.game = game
+        game.reset()
+        self.press(pygame.K_SPACE)  # Intro -> Zone 1
+        self.templates = {'scarcity': game.snapshot()}
+        game.state = GameState.ZONE_RIVERBANK
+        game.setup_zones()
+        self.templates['riverbank'] = game.snapshot()
+        self.edges: Dict[State, List[Tuple[str, object]]] = {}
+        self.best: Dict[State, Tuple[float, Optional[str], object]] = {}
+        self.revival_costs: Dict[str, int] = {}
+
+    def start(self) -> State:
+        self.load_template('scarcity')
+        return self.read('scarcity', None)
+
+    def press(self, key: int) -> None:
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode='', scancode=0))
+        self.game.handle_events()
+
+    def load_template(self, zone: str) -> None:
+        self.game.restore(self.templates[zone])
+
+    def load(self, state: State) -> None:
+        """Put the game into a canonical state"""
+        zone, choice, gems, npcs, collected = state
+        game = self.game
+        self.load_template(zone)
+        game.choice_made = choice
+        game.player.resources = gems
+        for npc, (dead, helped, given, required) in zip(game.npcs, npcs):
+            npc.dead, npc.helped, npc.gems_given, npc.gems_required = dead, helped, given, required
+            npc.needs_help = not (dead or helped)
+            npc.update_sprite()
+        for gem in game.resources[:collected]:
+            gem.collected = True
+        game.choice_active = zone == 'scarcity' and collected >= len(game.resources)
+
+    def read(self, zone: str, choice: Optional[str]):
+        """Canonical key for wherever the game is now"""
+        game = self.game
+        if game.state == GameState.VICTORY:
+            return VICTORY
+        npcs = tuple(sorted((n.dead, n.helped, n.gems_given, n.gems_required) for n in game.npcs))
+        collected = sum(gem.collected for gem in game.resources)
+        return (zone, choice, game.player.resources, npcs, collected)
+
+    def moves(self, state: State) -> List[Tuple[str, object]]:
+        """Every (action, next state) the rules allow from a state"""
+        if state in self.edges:
+            return self.edges[state]
+        zone, choice, gems, npcs, collected = state
+        game = self.game
+        moves = []
+
+        self.load(state)
+        if collected < len(game.resources):
+            # Stand on the next gem and let update() pick it up
+            game.player.rect.center = game.resources[collected].rect.center
+            game.update()
+            moves.append(('collect gem', self.read(zone, choice)))
+
+        if zone == 'scarcity':
+            if game.choice_active:
+                for key, name in CHOICE_KEYS.items():
+                    self.load(state)
+                    self.press(key)
+                    if game.choice_made:
+                        moves.append((f'choose {name}', self.enter_riverbank()))
+        else:
+            for i in range(len(npcs)):
+                self.load(state)
+                npc = game.npcs[i]
+                was_dead = npc.dead
+                if game.help_npc(npc):
+                    if was_dead:
+                        self.revival_costs[choice] = gems - game.player.resources
+                    action = 'revive an NPC' if was_dead else 'give a gem'
+                    moves.append((action, self.read(zone, choice)))
+
+            # Walk into the enlightenment if it's there (update() may put it there first)
+            self.load(state)
+            for gem in game.resources:
+                gem.collected = True  # Don't pick anything up on the way
+            game.update()
+            if game.enlightenment_rect and game.state != GameState.VICTORY:
+                game.player.rect.center = game.enlightenment_rect.center
+                game.update()
+            if game.state == GameState.VICTORY:
+                moves.append(('enter the enlightenment', VICTORY))
+
+        # Different NPCs can lead to the same canonical state
+        self.edges[state] = list(dict.fromkeys(moves))
+        return self.edges[state]
+
+    def enter_riverbank(self) -> State:
+        """Carry the choice, gems and NPCs through the maze (which changes none of them)"""
+        game = self.game
+        choice, gems = game.choice_made, game.player.resources
+        npcs = tuple(sorted((n.dead, n.helped, n.gems_given, n.gems_required) for n in game.npcs))
+        return ('riverbank', choice, gems, npcs, 0)
+
+    def solve(self, state) -> float:
+        """Fewest gems still to pick up before VICTORY (inf if it can't be reached)"""
+        if state == VICTORY:
+            return 0
+        if state in self.best:
+            return self.best[state][0]
+        best = (UNREACHABLE, None, None)
+        for action, target in self.moves(state):
+            cost = self.solve(target) + (action == 'collect gem')
+            if cost < best[0]:
+                best = (cost, action, target)
+        self.best[state] = best
+        return best[0]
+
+    def path(self, state) -> List[str]:
+        steps = []
+        while state != VICTORY and self.best[state][1]:
+            _, action, state = self.best[state]
+            steps.append(action)
+        return steps
+
+
+def compress(steps: List[str]) -> str:
+    """'collect gem x3, give a gem' instead of repeating actions"""
+    parts = []
+    for step in steps:
+        if parts and parts[-1][0] == step:
+            parts[-1][1] += 1
+        else:
+            parts.append([step, 1])
+    return ', '.join(f'{step} x{count}' if count > 1 else step for step, count in parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seed', type=int, default=0, help="Seed for gem placement")
+    parser.add_argument('--states', action='store_true', help="List every state that can no longer win")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        game = Game(audio=False)
+        explorer = Explorer(game)
+        start = explorer.start()
+        explorer.solve(start)
+        explorer.load_template('riverbank')
+        zone3_gems = len(game.resources)
+
+    print(f"{len(explorer.best)} states, {sum(len(m) for m in explorer.edges.values())} transitions "
+          f"({zone3_gems} gems in Zone 3)")
+    print(f"{'choice':<9}{'victory':<9}{'gems kept':>10}{'revive':>8}{'zone 3 gems':>13}{'total gems':>12}"
+          f"{'dead ends':>11}")
+    # Zone 1: pick up gems until the choice comes up
+    state = start
+    while not any(action.startswith('choose') for action, _ in explorer.moves(state)):
+        state = next(target for action, target in explorer.moves(state) if action == 'collect gem')
+    zone1_gems = state[4]
+    choices = [(action, target) for action, target in explorer.moves(state) if action.startswith('choose')]
+    for action, entry in choices:
+        choice = entry[1]
+        cost = explorer.best[entry][0]
+        reachable = [s for s in explorer.best if s[0] == 'riverbank' and s[1] == choice]
+        dead = [s for s in reachable if explorer.best[s][0] == UNREACHABLE]
+        revive = explorer.revival_costs.get(choice)
+        print(f"{choice:<9}{'yes' if cost < UNREACHABLE else 'no':<9}{entry[2]:>10}"
+              f"{revive if revive is not None else '-':>8}"
+              f"{cost if cost < UNREACHABLE else '-':>13}"
+              f"{zone1_gems + cost if cost < UNREACHABLE else '-':>12}{len(dead):>11}")
+    print()
+    for action, entry in choices:
+        print(f"{entry[1]:<9}{compress(explorer.path(entry)) or 'no way to win'}")
+    if args.states:
+        print("\nStates that can no longer reach VICTORY (choice, gems held, NPCs, zone gems collected):")
+        for state, (cost, _, _) in sorted(explorer.best.items(), key=str):
+            if cost == UNREACHABLE:
+                print(f"  {state[0]:<10}{state[1]!s:<8}{state[2]:>3}  {state[3]}  {state[4]}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
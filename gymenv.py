@@ -0,0 +1,220 @@
+"""Gym-style environment around the real game, observed through its pixels.
+
+    env = GameEnv(frame_skip=4, downsample=2)
+    obs, info = env.reset(seed=0)
+    obs, reward, terminated, truncated, info = env.step(RIGHT)
+
+    python gymenv.py --steps 2000       # random agent, prints steps per second
+
+Actions are the game's own inputs: hold W/A/S/D (or two of them), hold
+SPACE, or press 1-4. Held keys reach the game through Game.held_keys, and
+SPACE/1-4 are also posted as key presses, so the real handle_events/update
+code runs. Each step repeats the action for frame_skip frames and only draws
+the last one.
+
+The observation is the display surface itself: a (height, width, 3) view
+of its pixel memory, strided by `downsample`. The view is built once from
+Surface._pixels_address rather than with pygame.surfarray, whose views lock
+the surface for as long as they live and would stop the next step from
+drawing; so the usual `obs, ... = env.step(action)` loop works as is.
+Nothing is copied, so an observation is only valid until the next step() or
+reset(), which draw into the same pixels. Keep np.array(obs) if you need it
+longer.
+
+The dummy video and audio drivers are used by default (headless=True), so
+this runs on compute nodes without a display. Audio and the Zone 1 fog of
+war are off unless passed through as Game options.
+"""
+import argparse
+import ctypes
+import os
+import random
+import time
+from typing import Optional
+
+import numpy as np
+import pygame
+
+# What each action holds down; SPACE and 1-4 are also sent as key presses
+ACTIONS = (
+    ('noop', ()),
+    ('up', (pygame.K_w,)),
+    ('left', (pygame.K_a,)),
+    ('down', (pygame.K_s,)),
+    ('right', (pygame.K_d,)),
+    ('up-left', (pygame.K_w, pygame.K_a)),
+    ('up-right', (pygame.K_w, pygame.K_d)),
+    ('down-left', (pygame.K_s, pygame.K_a)),
+    ('down-right', (pygame.K_s, pygame.K_d)),
+    ('space', (pygame.K_SPACE,)),
+    ('choice 1', (pygame.K_1,)),
+    ('choice 2', (pygame.K_2,)),
+    ('choice 3', (pygame.K_3,)),
+    ('choice 4', (pygame.K_4,)),
+)
+NOOP, UP, LEFT, DOWN, RIGHT, UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT, SPACE = range(10)
+PRESSED_KEYS = {pygame.K_SPACE, pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4}
+
+# Rewards: reaching a new zone, picking up a gem, winning
+ZONE_REWARD = 1.0
+GEM_REWARD = 0.1
+VICTORY_REWARD = 10.0
+
+
+def pixel_view(surface: pygame.Surface) -> np.ndarray:
+    """(height, width, 3) RGB view of a 32-bit surface's pixels that holds no lock.
+
+    The surface must outlive the view and must not be resized; the display
+    surface of a running game is neither freed nor reallocated.
+    """
+    if surface.get_bytesize() != 4:
+        raise ValueError(f"Expected a 32-bit surface, got {surface.get_bitsize()} bits")
+    width, height = surface.get_size()
+    pitch = surface.get_pitch()
+    memory = (ctypes.c_uint8 * (pitch * height)).from_address(surface._pixels_address)
+    pixels = np.frombuffer(memory, dtype=np.uint8).reshape(height, pitch)[:, :width * 4]
+    pixels = pixels.reshape(height, width, 4)
+    # Byte of each channel within a (little-endian) pixel
+    red, green, blue = (shift // 8 for shift in surface.get_shifts()[:3])
+    if (red, green, blue) == (2, 1, 0):
+        return pixels[:, :, 2::-1]
+    if (red, green, blue) == (0, 1, 2):
+        return pixels[:, :, :3]
+    raise ValueError(f"Unsupported channel layout {surface.get_shifts()}")
+
+
+class GameEnv:
+    """reset()/step() around one Game, with the display pixels as observations"""
+
+    def __init__(self, frame_skip: int = 4, downsample: int = 1, max_steps: int = 5000,
+                 headless: bool = True, **game_options):
+        if headless:
+            os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+            os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        from the_game import Game, GameState, HeldKeys
+
+        self.GameState = GameState
+        self.HeldKeys = HeldKeys
+        self.zones = (GameState.ZONE_SCARCITY, GameState.ZONE_MAZE, GameState.ZONE_RIVERBANK, GameState.VICTORY)
+        game_options.setdefault('audio', False)
+        game_options.setdefault('lighting', False)  # Pass lighting=True to observe the fog of war
+        self.game = Game(idle_mode=False, **game_options)
+        self.screen = self.game.renderer.screen
+        if self.screen is None:
+            raise ValueError(f"GameEnv observes the display surface, which the {self.game.renderer.name} "
+                             "renderer doesn't have; use renderer='software'")
+        self.pixels = pixel_view(self.screen)
+        width, height = self.screen.get_size()
+        self.frame_skip = frame_skip
+        self.downsample = downsample
+        self.max_steps = max_steps
+        self.action_count = len(ACTIONS)
+        self.observation_shape = (-(-height // downsample), -(-width // downsample), 3)
+        self.steps = 0
+        self.frames = 0
+        self.zone = 0
+        self.collected = 0
+
+    def reset(self, seed: Optional[int] = None):
+        """Start a new run in Zone 1; returns (observation, info)"""
+        if seed is not None:
+            random.seed(seed)
+        game = self.game
+        game.reset()
+        game.held_keys = self.HeldKeys()
+        self.press(pygame.K_SPACE)  # Leave the intro
+        self.run_frame(draw=True)
+        self.steps = 0
+        self.zone = self.zones.index(game.state)
+        self.collected = 0
+        return self.observe(), self.info()
+
+    def step(self, action: int):
+        """Hold the action for frame_skip frames; returns (observation, reward, terminated, truncated, info)"""
+        game = self.game
+        _, keys = ACTIONS[action]
+        game.held_keys = self.HeldKeys(keys)
+        for key in keys:
+            if key in PRESSED_KEYS:
+                self.press(key)
+        for i in range(self.frame_skip):
+            done = game.state == self.GameState.VICTORY
+            self.run_frame(draw=done or i == self.frame_skip - 1)
+            if done:
+                break
+        self.steps += 1
+
+        reward = 0.0
+        zone = self.zones.index(game.state)
+        collected = sum(gem.collected for gem in game.resources)
+        if zone != self.zone:
+            reward += VICTORY_REWARD if game.state == self.GameState.VICTORY else ZONE_REWARD * (zone - self.zone)
+        else:
+            reward += GEM_REWARD * (collected - self.collected)
+        self.zone, self.collected = zone, collected
+
+        terminated = game.state == self.GameState.VICTORY
+        truncated = not terminated and self.steps >= self.max_steps
+        return self.observe(), reward, terminated, truncated, self.info()
+
+    def close(self) -> None:
+        self.game.shutdown()
+
+    def press(self, key: int) -> None:
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode='', scancode=0))
+
+    def run_frame(self, draw: bool) -> None:
+        game = self.game
+        game.handle_events()
+        if game.state != self.GameState.VICTORY:
+            game.update()
+        if draw:
+            game.draw()
+            game.renderer.present()
+        self.frames += 1
+
+    def observe(self) -> np.ndarray:
+        """(height, width, 3) view of the display; no pixels are copied"""
+        pixels = self.pixels
+        step = self.downsample
+        return pixels[::step, ::step] if step > 1 else pixels
+
+    def info(self) -> dict:
+        game = self.game
+        return {'state': game.state.name, 'gems': game.player.resources, 'choice': game.choice_made,
+                'steps': self.steps, 'frames': self.frames}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--frame-skip', type=int, default=4)
+    parser.add_argument('--downsample', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    import contextlib
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        env = GameEnv(frame_skip=args.frame_skip, downsample=args.downsample)
+        rng = np.random.default_rng(args.seed)
+        obs, info = env.reset(seed=args.seed)
+        shape, shares = obs.shape, np.shares_memory(obs, env.pixels)
+        total = 0.0
+        episodes = 0
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            obs, reward, terminated, truncated, info = env.step(int(rng.integers(env.action_count)))
+            total += reward
+            if terminated or truncated:
+                episodes += 1
+                env.reset()
+        elapsed = time.perf_counter() - start
+        env.close()
+    print(f"observation {shape} uint8, view of the display: {shares}")
+    print(f"{args.steps} steps ({env.frames} frames) in {elapsed:.2f}s: {args.steps / elapsed:.0f} steps/s, "
+          f"{env.frames / elapsed:.0f} frames/s; reward {total:.1f}, {episodes} episodes ended, last state {info['state']}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Input-to-present latency measurement and late input sampling.
+
+Every input event is stamped when pygame.event.get() hands it to us; the
+next present() after that is the first frame that can show its effect, so
+the difference is the event's latency. FramePacer moves the frame's wait in
+front of input sampling ('late' mode): instead of sampling right after a
+present and then sleeping, it sleeps first and samples input just early
+enough to update, draw and present before the frame deadline. The _async
+variants pace the same way for asyncio loops, yielding instead of blocking.
+"""
+import time
+from collections import deque
+from typing import Dict, Iterable
+
+import pygame
+
+INPUT_EVENTS = (pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+SAMPLES = 2048  # Latencies kept for the percentiles
+PACING_MODES = ('default', 'late')
+FRAME_TIME = 1 / 60
+LATE_MARGIN = 0.002  # Seconds of slack kept before the deadline in late mode
+
+
+class LatencyTracker:
+    """Collects input-to-present latencies in milliseconds.
+
+    An event read by get() arrived at some point after the previous get(),
+    so besides the measured latency (get to present) we keep the upper bound
+    (previous get to present), which is what the time spent waiting between
+    polls adds to.
+    """
+
+    def __init__(self, samples: int = SAMPLES):
+        self.pending = []  # (read at, previous poll) of input events not yet presented
+        self.samples = deque(maxlen=samples)
+        self.worst = deque(maxlen=samples)
+        self.events = 0
+        self.last_poll = None
+
+    def stamp(self, events: Iterable[pygame.event.Event]) -> None:
+        """Call with the events returned by pygame.event.get()"""
+        now = time.perf_counter()
+        previous = self.last_poll or now
+        self.last_poll = now
+        for event in events:
+            if event.type in INPUT_EVENTS:
+                self.pending.append((now, previous))
+
+    def presented(self) -> None:
+        """Call right after a frame is presented"""
+        if not self.pending:
+            return
+        now = time.perf_counter()
+        for read, previous in self.pending:
+            self.samples.append((now - read) * 1000)
+            self.worst.append((now - previous) * 1000)
+        self.events += len(self.pending)
+        self.pending.clear()
+
+    def percentiles(self, worst: bool = False) -> Dict[str, float]:
+        samples = self.worst if worst else self.samples
+        if not samples:
+            return {}
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+        return {
+            'p50_ms': ordered[last // 2],
+            'p95_ms': ordered[last * 95 // 100],
+            'p99_ms': ordered[last * 99 // 100],
+            'max_ms': ordered[last],
+        }
+
+    def format(self) -> str:
+        if not self.samples:
+            return "Input latency: no input events presented"
+        lines = [f"Input latency over {len(self.samples)} of {self.events} events:"]
+        for label, worst in (("read to present", False), ("upper bound", True)):
+            values = "  ".join(f"{key[:-3]} {value:6.1f} ms" for key, value in self.percentiles(worst).items())
+            lines.append(f"  {label:<16}{values}")
+        return "\n".join(lines)
+
+
+class FramePacer:
+    """Decides when a frame starts sampling input and when it ends"""
+
+    def __init__(self, mode: str = 'default', clock: pygame.time.Clock = None):
+        if mode not in PACING_MODES:
+            raise ValueError(f"Unknown pacing mode {mode!r}, expected one of {PACING_MODES}")
+        self.mode = mode
+        self.clock = clock or pygame.time.Clock()
+        self.deadline = time.perf_counter()
+        self.work_times = deque(maxlen=30)  # Recent sample-to-present durations
+        self.sampled = 0.0
+
+    def input_time(self) -> float:
+        """Late mode: when to sample input so the frame's work ends at the deadline"""
+        # The slowest recent frame is the estimate, so we rarely miss the deadline
+        work = max(self.work_times, default=FRAME_TIME / 2)
+        return self.deadline - work - LATE_MARGIN
+
+    def before_input(self, wait: bool = True) -> None:
+        """Late mode: sleep until just enough time is left for this frame's work"""
+        if self.mode == 'late' and wait:
+            delay = self.input_time() - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self.sampled = time.perf_counter()
+
+    def frame_done(self, presented: bool) -> None:
+        now = time.perf_counter()
+        if presented:
+            self.work_times.append(now - self.sampled)
+        self.deadline = max(self.deadline + FRAME_TIME, now)
+
+    def after_present(self, presented: bool) -> None:
+        self.frame_done(presented)
+        if self.mode == 'late':
+            self.clock.tick()  # Keeps get_fps() meaningful; the sleep happens in before_input
+        else:
+            self.clock.tick(60)
+
+    async def before_input_async(self, wait: bool = True) -> None:
+        if self.mode == 'late' and wait:
+            await sleep_until(self.input_time())
+        self.sampled = time.perf_counter()
+
+    async def after_present_async(self, presented: bool) -> None:
+        """Always yields to the event loop at least once per frame"""
+        self.frame_done(presented)
+        self.clock.tick()
+        if self.mode == 'late':
+            import asyncio  # Only asyncio loops get here; blocking ones never import it
+            await asyncio.sleep(0)
+        else:
+            # Default mode's deadline is when the next frame starts
+            await sleep_until(self.deadline)
+
+
+async def sleep_until(deadline: float) -> None:
+    """Sleep until about time.perf_counter() == deadline, letting other tasks run.
+
+    Always yields at least once. asyncio.sleep() may wake a millisecond or two
+    late; FramePacer's deadlines don't drift from that, and spinning out the
+    rest of the frame instead would keep a core busy on kiosks and in browsers.
+    """
+    import asyncio
+    await asyncio.sleep(max(0.0, deadline - time.perf_counter()))
@@ -0,0 +1,137 @@
+"""Fog of war for Zone 1: a pool of light around the player that walls block.
+
+Visibility is worked out on a coarse grid (CELL pixels per cell) instead of
+per pixel. Walls are rasterized into a blocked-cell mask once per zone. For
+each cell within reach of the light, a ray is sampled at fixed steps
+toward the player, and the cell is dark if any sample lands on a blocked
+cell. Ray offsets are precomputed as flat indexes, so an update is one
+take() and an any() over the window around the player. Updates only
+happen when the player moves into another cell. The result is smoothscaled
+into a preallocated alpha surface that's blitted over the world every
+frame; only the part around the old and new light is rescaled, since
+everything else stays uniformly dark. Near the player it's a faint warm
+tint and further out it's black.
+"""
+from typing import List, Tuple
+
+import numpy as np
+import pygame
+
+CELL = 8  # Pixels per visibility cell
+RADIUS = 180  # Reach of the light in pixels
+DARKNESS = 235  # Alpha where no light reaches; walls still show faintly
+GLOW = (255, 190, 110)  # Warm tint at the middle of the light
+GLOW_ALPHA = 40
+
+
+class Lighting:
+    def __init__(self, world: pygame.Rect, walls: List[pygame.Rect], radius: int = RADIUS, cell: int = CELL):
+        self.world = pygame.Rect(world)
+        self.cell = cell
+        rows, cols = -(-world.height // cell), -(-world.width // cell)
+        reach = self.reach = -(-radius // cell)
+
+        # Blocked cells, padded by the reach so windows near the edge need no clipping
+        blocked = np.ones((rows + 2 * reach, cols + 2 * reach), dtype=bool)
+        blocked[reach:-reach, reach:-reach] = False
+        for wall in walls:
+            rect = wall.clip(world).move(-world.x, -world.y)
+            if rect.width and rect.height:
+                blocked[reach + rect.top // cell:reach - (-rect.bottom // cell),
+                        reach + rect.left // cell:reach - (-rect.right // cell)] = True
+        self.blocked = blocked.ravel()
+        padded_cols = blocked.shape[1]
+
+        # Every cell in reach, as offsets from the player's cell
+        dy, dx = np.mgrid[-reach:reach + 1, -reach:reach + 1]
+        distance = np.hypot(dx, dy)
+        inside = distance <= reach
+        dy, dx, distance = dy[inside], dx[inside], distance[inside]
+        self.window_rows, self.window_cols = dy + reach, dx + reach
+        # Light falls off toward the edge of the reach (1 at the player, 0 in the dark)
+        self.falloff = (1 - distance / reach) ** 0.7
+
+        # Ray samples between the player (t=0) and each cell (t=1), both excluded,
+        # at half-cell steps so no cell along the way is skipped
+        steps = 2 * reach
+        t = np.arange(1, steps)[:, None] / steps
+        ray_rows = np.rint(dy * t).astype(np.intp)
+        ray_cols = np.rint(dx * t).astype(np.intp)
+        # Offsets into the flattened blocked mask from the player's cell
+        self.ray_offsets = ray_rows * padded_cols + ray_cols
+        self.padded_cols = padded_cols
+        # Samples that round onto either end don't count: the player's cell may
+        # touch a wall, and a wall cell facing the player should be lit
+        self.ray_between = (((ray_rows != 0) | (ray_cols != 0)) &
+                            ((ray_rows != dy) | (ray_cols != dx)))
+
+        self.light = np.zeros(blocked.shape, dtype=np.float32)
+        self.grid = pygame.Surface((cols, rows), pygame.SRCALPHA)
+        self.grid.fill((0, 0, 0, DARKNESS))
+        self.glow = np.array(GLOW, dtype=np.float32)
+        # Whole cells, so cells line up with the walls they were rasterized from;
+        # any overhang past the world's edge is never on screen
+        self.surface = pygame.transform.smoothscale(self.grid, (cols * cell, rows * cell))
+        self.fresh = False  # The current surface changed since it was last drawn
+        self.origin = None
+        self.last_window = None
+        self.updates = 0
+
+    def cell_of(self, pos: Tuple[int, int]) -> Tuple[int, int]:
+        cell = self.cell
+        return (pos[1] - self.world.y) // cell, (pos[0] - self.world.x) // cell
+
+    def update(self, pos: Tuple[int, int]) -> bool:
+        """Relight around a world position; a no-op unless it's in another cell"""
+        origin = self.cell_of(pos)
+        if origin == self.origin:
+            return False
+        reach = self.reach
+        rows, cols = self.grid.get_height(), self.grid.get_width()
+        row, col = min(max(origin[0], 0), rows - 1), min(max(origin[1], 0), cols - 1)
+
+        # In padded coordinates the player's cell is (row + reach, col + reach)
+        hits = self.blocked.take(self.ray_offsets + ((row + reach) * self.padded_cols + col + reach))
+        shadowed = (hits & self.ray_between).any(axis=0)
+
+        size = 2 * reach + 1
+        # The window in grid cells, plus a dark border so the rescaled edges
+        # blend into darkness exactly as a full rescale would
+        window = pygame.Rect(col - reach, row - reach, size, size).inflate(2, 2)
+        changed = window.union(self.last_window) if self.last_window else window
+        if self.last_window is not None:
+            # Only the previous window was lit; put it back to darkness
+            last = self.last_window.move(reach + 1, reach + 1)
+            self.light[last.top:last.top + size, last.left:last.left + size] = 0
+        lit = self.light[row:row + size, col:col + size]
+        lit[self.window_rows, self.window_cols] = np.where(shadowed, 0, self.falloff)
+        self.last_window = window
+        self.origin = origin
+
+        changed = changed.clip(self.grid.get_rect())  # Also what surface needs rescaling
+        light = self.light[reach + changed.top:reach + changed.bottom, reach + changed.left:reach + changed.right].T
+        alpha = DARKNESS - (DARKNESS - GLOW_ALPHA) * light
+        pygame.surfarray.pixels_alpha(self.grid)[changed.left:changed.right, changed.top:changed.bottom] = alpha
+        # Over the black floor the tint shows as color * alpha, so scale the color to
+        # keep that fading out with the light
+        pygame.surfarray.pixels3d(self.grid)[changed.left:changed.right, changed.top:changed.bottom] = (
+            (light * (GLOW_ALPHA / alpha))[:, :, None] * self.glow)
+
+        # smoothscale() lines up the first and last pixels, so n cells scaled to
+        # (n - 1) * cell pixels put every cell's middle at the same spot whichever
+        # region it's scaled in, and the regions match what's already there
+        cell = self.cell
+        target = pygame.Rect(changed.x * cell + cell // 2, changed.y * cell + cell // 2,
+                             (changed.width - 1) * cell, (changed.height - 1) * cell)
+        pygame.transform.smoothscale(self.grid.subsurface(changed), target.size, self.surface.subsurface(target))
+        self.fresh = True
+        self.updates += 1
+        return True
+
+    def draw(self, renderer) -> None:
+        if self.fresh:
+            # Texture renderers re-upload it
+            renderer.blit_fresh(self.surface, self.world.topleft)
+            self.fresh = False
+        else:
+            renderer.blit(self.surface, self.world.topleft)
@@ -0,0 +1,17 @@
+"""Entry point for browser builds: `pygbag .` packages this folder.
+
+pygbag needs an asyncio main that yields every frame, which is what
+Game.run_async does. Any asyncio host can use it the same way.
+"""
+import asyncio
+
+from the_game import Game
+
+
+async def main():
+    # Browsers drive frames from requestAnimationFrame, so keep drawing
+    game = Game(idle_mode=False)
+    await game.run_async()
+
+
+asyncio.run(main())
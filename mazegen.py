@@ -0,0 +1,194 @@
+"""Seeded maze generator for Zone 2.
+
+Mazes are perfect (every cell reachable from every other), so all four
+exits can always be reached from the start. Walls come out as a small set of
+merged rectangles: each grid line's wall segments are joined into runs.
+
+    python mazegen.py 200 200 --seed 1    # time a large maze and check it
+"""
+import random
+import time
+from collections import deque
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+Rect = Tuple[int, int, int, int]
+
+EXIT_DEPTH = 5  # Exit strips are this thick, like the hand-made maze's
+
+
+class Maze:
+    """A generated maze. Treat as immutable: instances are shared through the cache.
+
+    h_walls[r * cols + c] is the wall above cell (c, r) (r == rows is the
+    bottom border); v_walls[r * (cols + 1) + c] is the wall left of cell
+    (c, r) (c == cols is the right border). 1 means the wall is there.
+    """
+
+    def __init__(self, cols: int, rows: int, cell_size: int, wall_thickness: int,
+                 origin: Tuple[int, int], seed: int, h_walls: bytearray, v_walls: bytearray,
+                 exit_cells: Tuple[Tuple[int, int], ...], correct_exit: int):
+        self.cols = cols
+        self.rows = rows
+        self.cell_size = cell_size
+        self.wall_thickness = wall_thickness
+        self.origin = origin
+        self.seed = seed
+        self.h_walls = bytes(h_walls)
+        self.v_walls = bytes(v_walls)
+        self.exit_cells = exit_cells  # North, east, south, west
+        self.correct_exit = correct_exit
+        self.start_cell = (cols // 2, rows // 2)
+        self.size = (cols * cell_size + wall_thickness, rows * cell_size + wall_thickness)
+        self.walls = tuple(self._merged_walls())
+        self.exit_rects = tuple(self._exit_rects())
+
+    def cell_center(self, cell: Tuple[int, int]) -> Tuple[int, int]:
+        """Pixel center of a cell's open area"""
+        half = (self.cell_size + self.wall_thickness) // 2
+        return (self.origin[0] + cell[0] * self.cell_size + half,
+                self.origin[1] + cell[1] * self.cell_size + half)
+
+    @property
+    def start(self) -> Tuple[int, int]:
+        return self.cell_center(self.start_cell)
+
+    def neighbours(self, cell: Tuple[int, int]):
+        """Cells reachable in one step from a cell (no wall in between)"""
+        c, r = cell
+        cols = self.cols
+        if r > 0 and not self.h_walls[r * cols + c]:
+            yield (c, r - 1)
+        if r < self.rows - 1 and not self.h_walls[(r + 1) * cols + c]:
+            yield (c, r + 1)
+        if c > 0 and not self.v_walls[r * (cols + 1) + c]:
+            yield (c - 1, r)
+        if c < cols - 1 and not self.v_walls[r * (cols + 1) + c + 1]:
+            yield (c + 1, r)
+
+    def solve(self, goal: Optional[Tuple[int, int]] = None) -> List[Tuple[int, int]]:
+        """Cells from the start to goal (default: the correct exit's cell), or [] if unreachable"""
+        goal = goal or self.exit_cells[self.correct_exit]
+        previous = {self.start_cell: None}
+        queue = deque([self.start_cell])
+        while queue:
+            cell = queue.popleft()
+            if cell == goal:
+                path = []
+                while cell is not None:
+                    path.append(cell)
+                    cell = previous[cell]
+                return path[::-1]
+            for nxt in self.neighbours(cell):
+                if nxt not in previous:
+                    previous[nxt] = cell
+                    queue.append(nxt)
+        return []
+
+    def _merged_walls(self):
+        ox, oy = self.origin
+        size, t = self.cell_size, self.wall_thickness
+        cols, rows = self.cols, self.rows
+        # Horizontal runs, one grid line at a time
+        for r in range(rows + 1):
+            row = self.h_walls[r * cols:(r + 1) * cols]
+            c = 0
+            while c < cols:
+                if row[c]:
+                    start = c
+                    while c < cols and row[c]:
+                        c += 1
+                    yield (ox + start * size, oy + r * size, (c - start) * size + t, t)
+                else:
+                    c += 1
+        # Vertical runs
+        stride = cols + 1
+        for c in range(cols + 1):
+            r = 0
+            while r < rows:
+                if self.v_walls[r * stride + c]:
+                    start = r
+                    while r < rows and self.v_walls[r * stride + c]:
+                        r += 1
+                    yield (ox + c * size, oy + start * size, t, (r - start) * size + t)
+                else:
+                    r += 1
+
+    def _exit_rects(self):
+        ox, oy = self.origin
+        size, t = self.cell_size, self.wall_thickness
+        width, height = self.size
+        (nc, _), (_, er), (sc, _), (_, wr) = self.exit_cells
+        yield (ox + nc * size + t, oy, size - t, EXIT_DEPTH)                                # North
+        yield (ox + width - EXIT_DEPTH, oy + er * size + t, EXIT_DEPTH, size - t)          # East
+        yield (ox + sc * size + t, oy + height - EXIT_DEPTH, size - t, EXIT_DEPTH)         # South
+        yield (ox, oy + wr * size + t, EXIT_DEPTH, size - t)                               # West
+
+
+@lru_cache(maxsize=8)
+def generate_maze(cols: int, rows: int, seed: int = 0, cell_size: int = 48,
+                  wall_thickness: int = 8, origin: Tuple[int, int] = (0, 0)) -> Maze:
+    """Carve a maze with an iterative randomized depth-first search.
+
+    Results are cached, so a maze can be built ahead of time and picked up at
+    zone entry for free.
+    """
+    if cols < 2 or rows < 2:
+        raise ValueError("A maze needs at least 2x2 cells")
+    rng = random.Random(seed)
+    h_walls = bytearray(b'\x01') * ((rows + 1) * cols)
+    v_walls = bytearray(b'\x01') * (rows * (cols + 1))
+    visited = bytearray(cols * rows)
+
+    stack = [(cols // 2, rows // 2)]
+    visited[(rows // 2) * cols + cols // 2] = 1
+    while stack:
+        c, r = stack[-1]
+        options = []
+        if r > 0 and not visited[(r - 1) * cols + c]:
+            options.append((c, r - 1))
+        if r < rows - 1 and not visited[(r + 1) * cols + c]:
+            options.append((c, r + 1))
+        if c > 0 and not visited[r * cols + c - 1]:
+            options.append((c - 1, r))
+        if c < cols - 1 and not visited[r * cols + c + 1]:
+            options.append((c + 1, r))
+        if not options:
+            stack.pop()
+            continue
+        nc, nr = options[rng.randrange(len(options))]
+        if nc == c:
+            h_walls[max(r, nr) * cols + c] = 0
+        else:
+            v_walls[r * (cols + 1) + max(c, nc)] = 0
+        visited[nr * cols + nc] = 1
+        stack.append((nc, nr))
+
+    # Punch one exit in the middle of each border
+    exit_cells = ((cols // 2, 0), (cols - 1, rows // 2), (cols // 2, rows - 1), (0, rows // 2))
+    h_walls[cols // 2] = 0
+    v_walls[(rows // 2) * (cols + 1) + cols] = 0
+    h_walls[rows * cols + cols // 2] = 0
+    v_walls[(rows // 2) * (cols + 1)] = 0
+
+    return Maze(cols, rows, cell_size, wall_thickness, origin, seed, h_walls, v_walls,
+                exit_cells, rng.randrange(4))
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a maze and report its size")
+    parser.add_argument('cols', type=int)
+    parser.add_argument('rows', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    maze = generate_maze(args.cols, args.rows, args.seed)
+    elapsed = time.perf_counter() - start
+    segments = maze.h_walls.count(1) + maze.v_walls.count(1)
+    path = maze.solve()
+    print(f"{args.cols}x{args.rows} maze in {elapsed * 1000:.1f} ms: "
+          f"{len(maze.walls)} wall rects (from {segments} segments), "
+          f"{maze.size[0]}x{maze.size[1]} px, correct exit {maze.correct_exit}, "
+          f"solution {len(path)} cells")
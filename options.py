@@ -0,0 +1,9 @@
+"""Option values shared by the game's command line and the modules it loads lazily.
+
+This imports nothing, so the_game.py can build its argument parser without
+pulling in spectate (sockets, threads) or record (worker threads) when those
+features are off.
+"""
+
+SPECTATE_ADDRESS = 'localhost:8765'  # Where --spectate streams when no address is given
+RECORD_FORMATS = ('png', 'raw')
@@ -0,0 +1,144 @@
+"""Array-backed particle effects.
+
+All particle state lives in preallocated NumPy arrays. Emitting writes into
+the next slots of a ring (the oldest particles are recycled when the pool
+is full), and each frame integrates the whole pool with a few vectorized
+operations. Particles are plotted with surfarray: straight into the display
+surface on the software renderer, or into one overlay that the texture
+renderer uploads per frame.
+"""
+from typing import Tuple
+
+import numpy as np
+import pygame
+
+CAPACITY = 1 << 16  # Pooled particle slots
+DRAG = 0.96
+
+
+class ParticleSystem:
+    def __init__(self, capacity: int = CAPACITY, seed: int = 0):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.gravity = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)  # Frames left; <= 0 is a free slot
+        self.max_life = np.ones(capacity, dtype=np.float32)
+        self.color = np.zeros(capacity, dtype=np.uint32)  # Packed 0xRRGGBB
+        self.cursor = 0
+        self.active = False  # Whether any particle may still be alive
+        self.overlay = None  # Only used with the texture renderer
+
+    def clear(self) -> None:
+        self.life[:] = 0
+        self.active = False
+
+    def _slots(self, count: int) -> np.ndarray:
+        count = min(count, self.capacity)
+        slots = (self.cursor + np.arange(count)) % self.capacity
+        self.cursor = (self.cursor + count) % self.capacity
+        return slots
+
+    def emit(self, x, y, vx, vy, color: Tuple[int, int, int], life: float, gravity: float = 0.0) -> None:
+        """Spawn particles from arrays (or scalars) of positions and velocities"""
+        count = max(np.size(x), np.size(vx))
+        if count > self.capacity:
+            # The ring would only overwrite the extras with each other; keep what fits
+            count = self.capacity
+            x, y, vx, vy = (v[:count] if np.ndim(v) else v for v in (x, y, vx, vy))
+        slots = self._slots(count)
+        self.pos[slots, 0] = x
+        self.pos[slots, 1] = y
+        self.vel[slots, 0] = vx
+        self.vel[slots, 1] = vy
+        self.gravity[slots] = gravity
+        lives = life * self.rng.uniform(0.6, 1.0, len(slots))
+        self.life[slots] = lives
+        self.max_life[slots] = lives
+        self.color[slots] = (color[0] << 16) | (color[1] << 8) | color[2]
+        self.active = True
+
+    def burst(self, center: Tuple[int, int], color: Tuple[int, int, int], count: int = 120,
+              speed: float = 3.0, life: float = 45) -> None:
+        """Particles flying out of a point in every direction (gem pickup)"""
+        angles = self.rng.uniform(0, 2 * np.pi, count)
+        speeds = self.rng.uniform(0.3, 1.0, count) * speed
+        self.emit(center[0], center[1], np.cos(angles) * speeds, np.sin(angles) * speeds,
+                  color, life, gravity=0.05)
+
+    def trail(self, start: Tuple[int, int], end: Tuple[int, int], color: Tuple[int, int, int],
+              count: int = 80, life: float = 30) -> None:
+        """Particles streaming from start to end, arriving as they fade (gem given)"""
+        t = self.rng.uniform(0, 1, count)
+        dx, dy = end[0] - start[0], end[1] - start[1]
+        jitter = self.rng.normal(0, 3, (2, count))
+        # Spread along the first part of the line, moving toward the end
+        x = start[0] + dx * t * 0.3 + jitter[0]
+        y = start[1] + dy * t * 0.3 + jitter[1]
+        self.emit(x, y, (end[0] - x) / life, (end[1] - y) / life, color, life)
+
+    def ambient(self, rect: pygame.Rect, color: Tuple[int, int, int], count: int = 6, life: float = 90) -> None:
+        """A few motes drifting up from a ring around rect (call every frame)"""
+        angles = self.rng.uniform(0, 2 * np.pi, count)
+        radius = rect.width * self.rng.uniform(0.5, 1.0, count)
+        x = rect.centerx + np.cos(angles) * radius
+        y = rect.centery + np.sin(angles) * radius
+        self.emit(x, y, self.rng.normal(0, 0.2, count), -self.rng.uniform(0.2, 0.8, count),
+                  color, life, gravity=-0.005)
+
+    def update(self) -> None:
+        if not self.active:
+            return
+        self.vel *= DRAG
+        self.vel[:, 1] += self.gravity
+        self.pos += self.vel
+        self.life -= 1
+        self.active = bool((self.life > 0).any())
+
+    def draw(self, renderer, viewport: pygame.Rect) -> None:
+        if not self.active:
+            return
+        ox, oy = viewport.topleft
+        x = self.pos[:, 0] - ox
+        y = self.pos[:, 1] - oy
+        live = np.flatnonzero((self.life > 0) & (x >= 0) & (x < viewport.width - 1) &
+                              (y >= 0) & (y < viewport.height - 1))
+        if not len(live):
+            return
+        # Fade toward black as 8-bit fixed point, red and blue in one multiply
+        fade = (self.life[live] * (256 / self.max_life[live])).astype(np.uint32)
+        packed = self.color[live]
+        colors = ((packed & 0xff00ff) * fade >> 8) & 0xff00ff | ((packed & 0x00ff00) * fade >> 8) & 0x00ff00
+        xs, ys = x[live].astype(np.intp), y[live].astype(np.intp)
+
+        screen = renderer.screen
+        if screen is not None and screen.get_bytesize() == 4:
+            # Plot straight into the display surface
+            self._plot(screen, xs, ys, colors)
+            return
+
+        # Texture renderer: plot into a transparent overlay and upload it once
+        if self.overlay is None or self.overlay.get_size() != viewport.size:
+            self.overlay = pygame.Surface(viewport.size, pygame.SRCALPHA)
+        self.overlay.fill((0, 0, 0, 0))
+        self._plot(self.overlay, xs, ys, colors)
+        renderer.blit_fresh(self.overlay, (ox, oy))
+
+    @staticmethod
+    def _plot(surface: pygame.Surface, xs: np.ndarray, ys: np.ndarray, colors: np.ndarray) -> None:
+        """Write 2x2 opaque dots of packed 0xRRGGBB colors into a 32-bit surface"""
+        shifts, losses, masks = surface.get_shifts(), surface.get_losses(), surface.get_masks()
+        if shifts[:3] == (16, 8, 0) and not any(losses[:3]):
+            mapped = colors | np.uint32(masks[3])  # Already in the surface's layout
+        else:
+            mapped = ((colors >> 16 & 0xff) >> losses[0] << shifts[0] |
+                      (colors >> 8 & 0xff) >> losses[1] << shifts[1] |
+                      (colors & 0xff) >> losses[2] << shifts[2] |
+                      np.uint32(masks[3]))
+        pixels = pygame.surfarray.pixels2d(surface)
+        pixels[xs, ys] = mapped
+        pixels[xs + 1, ys] = mapped
+        pixels[xs, ys + 1] = mapped
+        pixels[xs + 1, ys + 1] = mapped
+        del pixels  # Unlock the surface
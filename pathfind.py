@@ -0,0 +1,253 @@
+"""Grid pathfinding for click-to-move.
+
+The zone's walls are rasterized onto a grid of cells half the player's
+size, and a cell is blocked if any wall overlaps it. A free cell always
+has room for a half-size player, and wherever the full player fits there
+is a free cell under its center. So a route exists on the grid whenever
+one exists in the zone, and Player.move's wall sliding covers the
+difference while following it.
+
+A* runs over flat cell indices with 8-way moves (no cutting corners) and
+an octile heuristic. Paths are cached per (start cell, goal cell), and a
+new grid, with an empty cache, is built whenever the zone's walls change.
+Rasterizing is a few numpy passes over the wall rects (a summed-area
+table of their corners): about 15 ms for a 200 x 200 maze, paid when the
+zone is entered rather than on the first click. Searches are time-sliced:
+Route.advance() stops at a perf_counter deadline, checked every
+SEARCH_SLICE cells, so a route across a huge generated maze takes a few
+frames instead of stalling one. Even freeing the search's lists is done
+a slice at a time.
+"""
+import heapq
+import time
+from itertools import chain
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pygame
+
+PATH_CACHE_SIZE = 256
+PATH_TIME = 0.004  # Seconds of searching per frame
+SEARCH_SLICE = 100  # Cells between clock checks, well under a millisecond
+STRAIGHT, DIAGONAL = 10, 14  # Move costs (x10 so they stay integers)
+SNAP_RADIUS = 4  # Cells searched around a click inside a wall for a free cell
+
+Waypoints = Tuple[Tuple[int, int], ...]
+
+
+def release(items: list) -> Iterator[None]:
+    """Empty a list a chunk at a time, yielding None in between: freeing a big
+    search's lists in one go takes longer than a frame's budget"""
+    while items:
+        del items[-20 * SEARCH_SLICE:]
+        yield None
+
+
+class Route:
+    """A path request; finished right away when it was cached"""
+
+    def __init__(self, grid: 'NavGrid', key, search: Optional[Iterator] = None,
+                 path: Optional[Waypoints] = None):
+        self.grid = grid
+        self.key = key
+        self.search = search
+        self.path = path
+        self.done = search is None
+        self.frames = 0  # Calls to advance() the search needed
+
+    def advance(self, budget: float = PATH_TIME) -> bool:
+        """Search for up to budget seconds; True once path is final (None if there's no way)"""
+        if self.done:
+            return True
+        self.frames += 1
+        deadline = time.perf_counter() + budget
+        for waypoints in self.search:
+            if waypoints is not None:
+                self.finish(waypoints or None)
+                return True
+            if time.perf_counter() >= deadline:
+                return False
+        self.finish(None)
+        return True
+
+    def finish(self, path: Optional[Waypoints]) -> None:
+        grid = self.grid
+        self.path = path
+        self.done = True
+        self.search = None
+        if len(grid.paths) >= PATH_CACHE_SIZE:
+            del grid.paths[next(iter(grid.paths))]  # Oldest first
+        grid.paths[self.key] = self.path
+
+
+class NavGrid:
+    def __init__(self, walls: Sequence[pygame.Rect], world: pygame.Rect, agent_size: int = 32):
+        self.world = pygame.Rect(world)
+        cell = self.cell = max(1, agent_size // 2)
+        self.cols = -(-world.width // cell)
+        self.rows = -(-world.height // cell)
+        blocked = self.blocked = self.rasterize(walls)
+        # The search runs on a copy with a blocked border, as plain bytes (fastest to
+        # index from Python), so neighbours never need bounds checks
+        self.stride = stride = self.cols + 2
+        self._blocked = np.pad(blocked, 1, constant_values=True).tobytes()
+        self.straight = (-stride, stride, -1, 1)
+        # Diagonal steps with the two cells beside them, which must both be open
+        self.diagonal = ((-stride - 1, -stride, -1), (-stride + 1, -stride, 1),
+                         (stride - 1, stride, -1), (stride + 1, stride, 1))
+        self.paths: Dict[Tuple[Tuple[int, int], Tuple[int, int]], Optional[Waypoints]] = {}
+        self.searches = 0
+        self.expanded = 0  # Cells expanded by the last search
+
+    def rasterize(self, walls: Sequence[pygame.Rect]) -> np.ndarray:
+        """(rows, cols) bools, True where any wall overlaps the cell"""
+        world, cell = self.world, self.cell
+        x, y, width, height = np.fromiter(chain.from_iterable(walls), dtype=np.int64,
+                                          count=4 * len(walls)).reshape(-1, 4).T
+        left = np.clip(x - world.x, 0, world.width)
+        right = np.clip(x + width - world.x, 0, world.width)
+        top = np.clip(y - world.y, 0, world.height)
+        bottom = np.clip(y + height - world.y, 0, world.height)
+        inside = (left < right) & (top < bottom)
+        first_col, first_row = left[inside] // cell, top[inside] // cell
+        end_col, end_row = -(-right[inside] // cell), -(-bottom[inside] // cell)
+        # +1 at each rect's top-left and bottom-right cell corners, -1 at the other
+        # two; summing down and across then counts the walls over every cell
+        span = self.cols + 1
+        size = (self.rows + 1) * span
+        plus = np.bincount(np.concatenate((first_row * span + first_col, end_row * span + end_col)), minlength=size)
+        minus = np.bincount(np.concatenate((first_row * span + end_col, end_row * span + first_col)), minlength=size)
+        cover = (plus - minus).reshape(self.rows + 1, span)
+        return cover.cumsum(0).cumsum(1)[:self.rows, :self.cols] > 0
+
+    def cell_of(self, pos: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """(column, row) under a world position, or None outside the grid"""
+        col = (pos[0] - self.world.x) // self.cell
+        row = (pos[1] - self.world.y) // self.cell
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return int(col), int(row)
+        return None
+
+    def center(self, index: int) -> Tuple[int, int]:
+        """World position of the middle of a (padded) cell index"""
+        row, col = divmod(index, self.stride)
+        half = self.cell // 2
+        return self.world.x + (col - 1) * self.cell + half, self.world.y + (row - 1) * self.cell + half
+
+    def nearest_free(self, cell: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """cell itself if it's free, else the closest free cell within SNAP_RADIUS"""
+        col, row = cell
+        if not self.blocked[row, col]:
+            return cell
+        top, left = max(row - SNAP_RADIUS, 0), max(col - SNAP_RADIUS, 0)
+        window = self.blocked[top:row + SNAP_RADIUS + 1, left:col + SNAP_RADIUS + 1]
+        rows, cols = np.nonzero(~window)
+        if not len(rows):
+            return None
+        nearest = np.argmin((rows + top - row) ** 2 + (cols + left - col) ** 2)
+        return int(cols[nearest] + left), int(rows[nearest] + top)
+
+    def route(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Route:
+        """Route between two world positions: cached, or a search to advance()"""
+        start_cell, goal_cell = self.cell_of(start), self.cell_of(goal)
+        key = (start_cell, goal_cell)
+        if key in self.paths:
+            return Route(self, key, path=self.paths[key])
+        start_free = start_cell and self.nearest_free(start_cell)
+        goal_free = goal_cell and self.nearest_free(goal_cell)
+        if not (start_free and goal_free):
+            return Route(self, key, path=None)
+        return Route(self, key, self.search(start_free, goal_free))
+
+    def path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[Waypoints]:
+        """World waypoints from start to goal in one go (None if there's no way)"""
+        route = self.route(start, goal)
+        while not route.advance():
+            pass
+        return route.path
+
+    def search(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Iterator[Optional[Waypoints]]:
+        """A* between cells. Yields None every SEARCH_SLICE steps, then the
+        waypoints (an empty tuple when there is no way)"""
+        stride = self.stride
+        blocked = self._blocked
+        straight, diagonal = self.straight, self.diagonal
+        start_index = (start[1] + 1) * stride + start[0] + 1
+        goal_index = (goal[1] + 1) * stride + goal[0] + 1
+        goal_row, goal_col = divmod(goal_index, stride)
+        self.searches += 1
+
+        # Flat lists over the whole grid: no resizing as the search grows
+        unreached = 1 << 60
+        cost = [unreached] * len(blocked)
+        came_from = [-1] * len(blocked)
+        cost[start_index] = 0
+        # Entries are (estimate, distance left, cost so far, cell); ties go to
+        # the cell closer to the goal, which keeps open areas cheap
+        heap = [(0, 0, 0, start_index)]
+        push, pop = heapq.heappush, heapq.heappop
+        expanded = 0
+        countdown = SEARCH_SLICE
+        while heap:
+            _, _, node_cost, node = pop(heap)
+            if node == goal_index:
+                break
+            if node_cost > cost[node]:
+                continue  # Stale entry; node was reached more cheaply since
+            expanded += 1
+            countdown -= 1
+            if not countdown:
+                self.expanded = expanded
+                yield None
+                countdown = SEARCH_SLICE
+            for step in straight:
+                neighbour = node + step
+                if blocked[neighbour]:
+                    continue
+                new_cost = node_cost + STRAIGHT
+                if new_cost < cost[neighbour]:
+                    cost[neighbour] = new_cost
+                    came_from[neighbour] = node
+                    row, col = divmod(neighbour, stride)
+                    dx, dy = abs(col - goal_col), abs(row - goal_row)
+                    left = STRAIGHT * (dx + dy) + (DIAGONAL - 2 * STRAIGHT) * (dx if dx < dy else dy)
+                    push(heap, (new_cost + left, left, new_cost, neighbour))
+            for step, side, other_side in diagonal:
+                neighbour = node + step
+                if blocked[neighbour] or blocked[node + side] or blocked[node + other_side]:
+                    continue
+                new_cost = node_cost + DIAGONAL
+                if new_cost < cost[neighbour]:
+                    cost[neighbour] = new_cost
+                    came_from[neighbour] = node
+                    row, col = divmod(neighbour, stride)
+                    dx, dy = abs(col - goal_col), abs(row - goal_row)
+                    left = STRAIGHT * (dx + dy) + (DIAGONAL - 2 * STRAIGHT) * (dx if dx < dy else dy)
+                    push(heap, (new_cost + left, left, new_cost, neighbour))
+        else:
+            self.expanded = expanded
+            yield from release(cost)
+            yield from release(came_from)
+            yield ()
+            return
+        self.expanded = expanded
+
+        yield from release(heap)
+
+        # Walk back from the goal keeping only the turns (long routes take a few slices too)
+        center = self.center
+        waypoints = [center(goal_index)]
+        later, node = goal_index, came_from[goal_index]
+        while node != -1 and came_from[node] != -1:  # The start cell itself isn't a waypoint
+            earlier = came_from[node]
+            if node - earlier != later - node:
+                waypoints.append(center(node))
+            later, node = node, earlier
+            countdown -= 1
+            if not countdown:
+                yield None
+                countdown = SEARCH_SLICE
+        waypoints.reverse()
+        yield from release(cost)
+        yield from release(came_from)
+        yield tuple(waypoints)
@@ -0,0 +1,114 @@
+"""Background recorder for gameplay frames.
+
+capture() runs on the frame thread between draw() and present(): it takes
+a free buffer from a fixed pool and copies the frame into it straight from
+the surface's pixel buffer (one memcpy through get_buffer, no Surface or
+bytes objects created). Worker threads reorder the pixels to RGB, write
+numbered PNGs or append to one raw stream, and return buffers to the pool.
+The pool bounds the queue: when it's empty because the workers are behind,
+the frame is dropped and counted rather than making the game wait.
+"""
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+import pygame
+
+from options import RECORD_FORMATS
+
+POOL_SIZE = 8  # Frames that can be waiting for a worker
+PNG_WORKERS = 3  # PNG encoding is the slow part; raw needs only one writer
+
+
+class Recorder:
+    """Records frames from a renderer into directory as PNGs or a raw stream"""
+
+    def __init__(self, directory: str, size, fmt: str = 'png', pool_size: int = POOL_SIZE):
+        if fmt not in RECORD_FORMATS:
+            raise ValueError(f"Unknown record format {fmt!r}, expected one of {RECORD_FORMATS}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.format = fmt
+        self.width, self.height = size
+        self.pool_size = pool_size
+        self.free = None  # Pool of frame buffers, sized on the first capture
+        self.channels = None  # Byte index of red, green and blue in a pixel
+        self.jobs = queue.Queue()
+        self.frame = 0  # Capture attempts, so file numbers show where frames were dropped
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.peak_backlog = 0
+        self.stream = None
+        self.lock = threading.Lock()  # Orders raw-stream writes and the counters
+        if fmt == 'raw':
+            self.stream = open(os.path.join(directory, 'frames.rgb'), 'wb')
+        workers = PNG_WORKERS if fmt == 'png' else 1
+        self.threads = [threading.Thread(target=self._worker, name=f'record-{i}', daemon=True)
+                        for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def capture(self, surface: pygame.Surface) -> bool:
+        """Queue a copy of the frame; returns False if it had to be dropped"""
+        self.frame += 1
+        bpp = surface.get_bytesize()
+        if self.free is None:
+            self.free = queue.Queue()
+            for _ in range(self.pool_size):
+                self.free.put(np.empty((self.height, self.width, bpp), dtype=np.uint8))
+            self.channels = [shift // 8 for shift in surface.get_shifts()[:3]]
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+
+        # View the pixels in place and copy them as they are
+        pixels = np.frombuffer(surface.get_buffer(), dtype=np.uint8)
+        rows = pixels.reshape(surface.get_height(), surface.get_pitch())
+        np.copyto(buffer, rows[:self.height, :self.width * bpp].reshape(self.height, self.width, bpp))
+        del pixels, rows  # Unlock the surface
+
+        self.captured += 1
+        self.jobs.put((self.frame, buffer))
+        self.peak_backlog = max(self.peak_backlog, self.jobs.qsize())
+        return True
+
+    def close(self) -> None:
+        """Finish every queued frame, then stop the workers"""
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.stream:
+            self.stream.close()
+            with open(os.path.join(self.directory, 'frames.json'), 'w') as f:
+                json.dump({'width': self.width, 'height': self.height, 'format': 'rgb24',
+                           'frames': self.written}, f)
+        print(self.format_stats())
+
+    def format_stats(self) -> str:
+        total = self.captured + self.dropped
+        rate = 100 * self.dropped / total if total else 0
+        return (f"Recorded {self.written} of {total} frames to {self.directory} "
+                f"({self.dropped} dropped, {rate:.1f}%; worker backlog peaked at {self.peak_backlog})")
+
+    def _worker(self) -> None:
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            number, buffer = job
+            rgb = np.ascontiguousarray(buffer[:, :, self.channels])
+            self.free.put(buffer)
+            if self.stream:
+                with self.lock:
+                    self.stream.write(rgb.data)
+            else:
+                image = pygame.image.frombuffer(rgb.data, (self.width, self.height), 'RGB')
+                pygame.image.save(image, os.path.join(self.directory, f'frame_{number:06d}.png'))
+            with self.lock:
+                self.written += 1
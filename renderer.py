@@ -0,0 +1,210 @@
+"""Rendering backends for Echoes of Humanity.
+
+All game drawing goes through one of these renderers, so the same draw code
+can target either the classic software display surface or an SDL Renderer
+that keeps every sprite resident as a texture.
+"""
+import weakref
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import pygame
+
+import startup
+
+# Renderer names accepted by create_renderer (and the --renderer option)
+RENDERERS = ('software', 'texture', 'texture-soft')
+
+# How many rendered text surfaces to keep around between frames
+TEXT_CACHE_SIZE = 256
+
+
+class SoftwareRenderer:
+    """Draws by blitting onto the display surface (the original path).
+
+    Positions are shifted by offset, which the game sets to the camera
+    position while drawing the world and back to (0, 0) for the HUD.
+    """
+    name = 'software'
+    offset = (0, 0)
+
+    def __init__(self, size: Tuple[int, int], caption: str):
+        self.size = size
+        self.screen = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+        self._text_cache = OrderedDict()
+        self.packed_text = {}  # Pre-rendered text from the asset pack, never evicted
+        self._shapes: Dict[tuple, pygame.Surface] = {}
+
+    def text_surface(self, font: pygame.font.Font, text: str, color) -> pygame.Surface:
+        """Render text once and reuse the surface while it stays in use"""
+        # Keying on the font itself keeps it alive, so its id can't be reused
+        key = (font, text, tuple(color))
+        surface = self.packed_text.get(key)
+        if surface is not None:
+            return surface
+        surface = self._text_cache.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self._text_cache[key] = surface
+            if len(self._text_cache) > TEXT_CACHE_SIZE:
+                self._text_cache.popitem(last=False)
+        else:
+            self._text_cache.move_to_end(key)
+        return surface
+
+    def shape_surface(self, kind: str, color, size: Tuple[int, int]) -> pygame.Surface:
+        """Get a cached translucent circle or rect surface"""
+        key = (kind, tuple(color), size)
+        surface = self._shapes.get(key)
+        if surface is None:
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            if kind == 'circle':
+                pygame.draw.circle(surface, color, (size[0] // 2, size[1] // 2), size[0] // 2)
+            else:
+                surface.fill(color)
+            self._shapes[key] = surface
+        return surface
+
+    def clear(self, color) -> None:
+        self.screen.fill(color)
+
+    def blit(self, surface: pygame.Surface, pos) -> None:
+        self.screen.blit(surface, (pos[0] - self.offset[0], pos[1] - self.offset[1]))
+
+    def blit_fresh(self, surface: pygame.Surface, pos) -> None:
+        """Blit a surface whose pixels change every frame"""
+        self.blit(surface, pos)
+
+    def blit_area(self, surface: pygame.Surface, pos, area) -> None:
+        """Blit only the area rect of a surface"""
+        self.screen.blit(surface, (pos[0] - self.offset[0], pos[1] - self.offset[1]), area)
+
+    def blits(self, sequence) -> None:
+        """Blit many (surface, pos) pairs in one call"""
+        ox, oy = self.offset
+        self.screen.blits([(surface, (x - ox, y - oy)) for surface, (x, y) in sequence], False)
+
+    def fill_rect(self, color, rect) -> None:
+        rect = pygame.Rect(rect).move(-self.offset[0], -self.offset[1])
+        if len(color) == 4 and color[3] < 255:
+            # The display surface has no alpha, so blend a cached surface instead
+            self.screen.blit(self.shape_surface('rect', color, rect.size), rect.topleft)
+        else:
+            pygame.draw.rect(self.screen, color, rect)
+
+    def draw_rect(self, color, rect, width: int = 1) -> None:
+        pygame.draw.rect(self.screen, color, pygame.Rect(rect).move(-self.offset[0], -self.offset[1]), width)
+
+    def circle(self, color, center, radius: int) -> None:
+        center = (center[0] - self.offset[0], center[1] - self.offset[1])
+        if len(color) == 4 and color[3] < 255:
+            surface = self.shape_surface('circle', color, (radius * 2, radius * 2))
+            self.screen.blit(surface, (center[0] - radius, center[1] - radius))
+        else:
+            pygame.draw.circle(self.screen, color, center, radius)
+
+    def read_frame(self) -> pygame.Surface:
+        """The frame drawn so far; call before present()"""
+        return self.screen
+
+    def present(self) -> None:
+        pygame.display.flip()
+
+
+class TextureRenderer(SoftwareRenderer):
+    """Draws through an SDL Renderer with sprites uploaded once as textures.
+
+    Pass software=True to force SDL's software renderer, which works on
+    machines without a GPU (and under the dummy video driver).
+    """
+    name = 'texture'
+
+    def __init__(self, size: Tuple[int, int], caption: str, software: bool = False):
+        from pygame._sdl2.video import Window, Renderer, Texture
+
+        self._texture_class = Texture
+        self.size = size
+        self.screen = None  # There is no display surface in this mode
+        self.window = Window(caption, size)
+        self.renderer = Renderer(self.window, accelerated=0 if software else -1)
+        self.renderer.draw_blend_mode = 1  # SDL_BLENDMODE_BLEND
+        if software:
+            self.name = 'texture-soft'
+        self._text_cache = OrderedDict()
+        self.packed_text = {}  # Pre-rendered text from the asset pack, never evicted
+        self._shapes = {}
+        # Textures live exactly as long as the surface they were uploaded from
+        self._textures = weakref.WeakKeyDictionary()
+        self._readback = None
+
+    def texture(self, surface: pygame.Surface):
+        """Upload a surface on first use and return its texture"""
+        texture = self._textures.get(surface)
+        if texture is None:
+            texture = self._texture_class.from_surface(self.renderer, surface)
+            # Opaque surfaces (like baked tiles) take SDL's much faster copy path
+            texture.blend_mode = 1 if surface.get_flags() & pygame.SRCALPHA else 0
+            self._textures[surface] = texture
+        return texture
+
+    def clear(self, color) -> None:
+        self.renderer.draw_color = tuple(color) + (255,) * (4 - len(color))
+        self.renderer.clear()
+
+    def blit(self, surface: pygame.Surface, pos) -> None:
+        texture = self.texture(surface)
+        texture.draw(dstrect=(pos[0] - self.offset[0], pos[1] - self.offset[1], texture.width, texture.height))
+
+    def blit_fresh(self, surface: pygame.Surface, pos) -> None:
+        # Re-upload the pixels into the surface's existing texture
+        self.texture(surface).update(surface)
+        self.blit(surface, pos)
+
+    def blit_area(self, surface: pygame.Surface, pos, area) -> None:
+        # A source rect into the surface's one texture, not a new upload
+        area = pygame.Rect(area)
+        self.texture(surface).draw(srcrect=area, dstrect=(pos[0] - self.offset[0], pos[1] - self.offset[1],
+                                                          area.width, area.height))
+
+    def blits(self, sequence) -> None:
+        for surface, pos in sequence:
+            self.blit(surface, pos)
+
+    def fill_rect(self, color, rect) -> None:
+        self.renderer.draw_color = tuple(color) + (255,) * (4 - len(color))
+        self.renderer.fill_rect(pygame.Rect(rect).move(-self.offset[0], -self.offset[1]))
+
+    def draw_rect(self, color, rect, width: int = 1) -> None:
+        self.renderer.draw_color = tuple(color) + (255,) * (4 - len(color))
+        rect = pygame.Rect(rect).move(-self.offset[0], -self.offset[1])
+        for i in range(width):
+            self.renderer.draw_rect(rect.inflate(-2 * i, -2 * i))
+
+    def circle(self, color, center, radius: int) -> None:
+        # Circles are baked into cached surfaces, so each one is a single textured quad
+        # (blit applies the offset)
+        surface = self.shape_surface('circle', color, (radius * 2, radius * 2))
+        self.blit(surface, (center[0] - radius, center[1] - radius))
+
+    def read_frame(self) -> pygame.Surface:
+        # Read back from the renderer into one reused surface
+        if self._readback is None:
+            self._readback = pygame.Surface(self.size, 0, 32)
+        return self.renderer.to_surface(self._readback)
+
+    def present(self) -> None:
+        self.renderer.present()
+
+
+def create_renderer(name: str, size: Tuple[int, int], caption: str) -> SoftwareRenderer:
+    """Create the named renderer, falling back to software blits if SDL can't"""
+    if name not in RENDERERS:
+        raise ValueError(f"Unknown renderer '{name}' (expected one of {', '.join(RENDERERS)})")
+    startup.require('display')
+    if name != 'software':
+        try:
+            return TextureRenderer(size, caption, software=(name == 'texture-soft'))
+        except (ImportError, pygame.error) as e:
+            print(f"Texture renderer unavailable ({e}), falling back to software")
+    return SoftwareRenderer(size, caption)
@@ -0,0 +1,187 @@
+"""Compact binary snapshots of a game session.
+
+This module only knows about plain values (ints, strings and rect tuples);
+Game.snapshot() gathers them and Game.restore() turns them back into NPCs
+and gems. Layout (little-endian):
+
+    header   magic 'EOHS', version, zone, choice, saved npc, flags,
+             correct exit, message timer, player x/y/gems
+    rects    enlightenment and goal rects, always present (see flags)
+    lists    walls, exit rects, river, rocks: count + 4 int32 per rect
+    npcs     count + x, y, type, flags, gems given, gems required
+    gems     count + x, y, collected
+    messages count + duration + utf-8 text
+"""
+import struct
+from array import array
+from typing import List, Optional, Tuple
+
+MAGIC = b'EOHS'
+VERSION = 1
+
+# Strings are stored as an index into these (0 means None)
+CHOICES = ('elder', 'child', 'both', 'neither')
+NPC_TYPES = ('generic', 'elder', 'child')
+
+# Header flags
+CHOICE_ACTIVE = 1
+REVIVED_NPC = 2
+VICTORY_SHOWN = 4
+HAS_ENLIGHTENMENT = 8
+HAS_GOAL = 16
+HAS_RIVER = 32
+
+# NPC flags
+NEEDS_HELP = 1
+HELPED = 2
+DEAD = 4
+
+HEADER = struct.Struct('<4sBBBBBBIiii')
+RECT = struct.Struct('<iiii')
+COUNT = struct.Struct('<I')
+NPC_RECORD = struct.Struct('<iiBBhh')
+GEM_RECORD = struct.Struct('<ii?')
+MESSAGE = struct.Struct('<IH')
+
+Rect = Tuple[int, int, int, int]
+
+
+def _encode_name(name: Optional[str], names: Tuple[str, ...]) -> int:
+    return 0 if name is None else names.index(name) + 1
+
+
+def _decode_name(code: int, names: Tuple[str, ...]) -> Optional[str]:
+    return None if code == 0 else names[code - 1]
+
+
+def _pack_rects(rects: List[Rect]) -> bytes:
+    flat = array('i', [value for rect in rects for value in rect])
+    return COUNT.pack(len(rects)) + flat.tobytes()
+
+
+def _unpack_rects(data: bytes, offset: int) -> Tuple[List[Rect], int]:
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    flat = array('i')
+    flat.frombytes(data[offset:offset + count * RECT.size])
+    rects = [tuple(flat[i:i + 4]) for i in range(0, len(flat), 4)]
+    return rects, offset + count * RECT.size
+
+
+def pack(session: dict) -> bytes:
+    """Encode a session dict (as built by Game.snapshot) to bytes"""
+    flags = 0
+    if session['choice_active']:
+        flags |= CHOICE_ACTIVE
+    if session['revived_npc']:
+        flags |= REVIVED_NPC
+    if session['victory_shown']:
+        flags |= VICTORY_SHOWN
+    if session['enlightenment_rect'] is not None:
+        flags |= HAS_ENLIGHTENMENT
+    if session['goal'] is not None:
+        flags |= HAS_GOAL
+    if session['river'] is not None:
+        flags |= HAS_RIVER
+
+    player_x, player_y, gems = session['player']
+    parts = [
+        HEADER.pack(MAGIC, VERSION, session['state'],
+                    _encode_name(session['choice_made'], CHOICES),
+                    _encode_name(session['saved_npc_type'], NPC_TYPES),
+                    flags, session['correct_exit'], session['message_timer'],
+                    player_x, player_y, gems),
+        RECT.pack(*(session['enlightenment_rect'] or (0, 0, 0, 0))),
+        RECT.pack(*(session['goal'] or (0, 0, 0, 0))),
+        _pack_rects(session['walls']),
+        _pack_rects(session['exit_rects']),
+        _pack_rects(session['river'] or []),
+        _pack_rects(session['rocks']),
+    ]
+
+    parts.append(COUNT.pack(len(session['npcs'])))
+    for x, y, npc_type, needs_help, helped, dead, gems_given, gems_required in session['npcs']:
+        npc_flags = (NEEDS_HELP if needs_help else 0) | (HELPED if helped else 0) | (DEAD if dead else 0)
+        parts.append(NPC_RECORD.pack(x, y, NPC_TYPES.index(npc_type), npc_flags, gems_given, gems_required))
+
+    parts.append(COUNT.pack(len(session['resources'])))
+    parts.extend(GEM_RECORD.pack(x, y, collected) for x, y, collected in session['resources'])
+
+    parts.append(COUNT.pack(len(session['messages'])))
+    for text, duration in session['messages']:
+        encoded = text.encode('utf-8')
+        parts.append(MESSAGE.pack(duration, len(encoded)))
+        parts.append(encoded)
+    return b''.join(parts)
+
+
+def unpack(data: bytes) -> dict:
+    """Decode bytes from pack(); raises ValueError for foreign, newer or damaged data"""
+    try:
+        return _unpack(data)
+    except (struct.error, IndexError) as e:
+        raise ValueError(f"Damaged snapshot: {e}") from e
+
+
+def _unpack(data: bytes) -> dict:
+    if len(data) < HEADER.size or data[:4] != MAGIC:
+        raise ValueError("Not an Echoes of Humanity snapshot")
+    (_, version, state, choice, saved_npc, flags, correct_exit, message_timer,
+     player_x, player_y, gems) = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version} (expected {VERSION})")
+    offset = HEADER.size
+
+    enlightenment_rect = RECT.unpack_from(data, offset)
+    goal = RECT.unpack_from(data, offset + RECT.size)
+    offset += 2 * RECT.size
+    walls, offset = _unpack_rects(data, offset)
+    exit_rects, offset = _unpack_rects(data, offset)
+    river, offset = _unpack_rects(data, offset)
+    rocks, offset = _unpack_rects(data, offset)
+
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    npcs = []
+    for x, y, npc_type, npc_flags, gems_given, gems_required in NPC_RECORD.iter_unpack(
+            data[offset:offset + count * NPC_RECORD.size]):
+        npcs.append((x, y, NPC_TYPES[npc_type], bool(npc_flags & NEEDS_HELP),
+                     bool(npc_flags & HELPED), bool(npc_flags & DEAD), gems_given, gems_required))
+    offset += count * NPC_RECORD.size
+
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    resources = list(GEM_RECORD.iter_unpack(data[offset:offset + count * GEM_RECORD.size]))
+    offset += count * GEM_RECORD.size
+
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    messages = []
+    for _ in range(count):
+        duration, length = MESSAGE.unpack_from(data, offset)
+        offset += MESSAGE.size
+        messages.append((data[offset:offset + length].decode('utf-8'), duration))
+        offset += length
+    if offset != len(data):
+        raise ValueError(f"Damaged snapshot: {len(data)} bytes, expected {offset}")
+
+    return {
+        'state': state,
+        'choice_made': _decode_name(choice, CHOICES),
+        'saved_npc_type': _decode_name(saved_npc, NPC_TYPES),
+        'choice_active': bool(flags & CHOICE_ACTIVE),
+        'revived_npc': bool(flags & REVIVED_NPC),
+        'victory_shown': bool(flags & VICTORY_SHOWN),
+        'correct_exit': correct_exit,
+        'message_timer': message_timer,
+        'player': (player_x, player_y, gems),
+        'enlightenment_rect': enlightenment_rect if flags & HAS_ENLIGHTENMENT else None,
+        'goal': goal if flags & HAS_GOAL else None,
+        'walls': walls,
+        'exit_rects': exit_rects,
+        'river': river if flags & HAS_RIVER else None,
+        'rocks': rocks,
+        'npcs': npcs,
+        'resources': resources,
+        'messages': messages,
+    }
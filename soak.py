@@ -0,0 +1,189 @@
+"""Headless soak test: a bot plays the game over and over while we watch memory.
+
+    python soak.py --duration 3h
+    python soak.py --duration 10m --interval 30 --threshold-mb 16
+
+After a warm-up (caches filled, first playthroughs done) it takes a
+tracemalloc baseline and the process RSS, then samples both every
+--interval seconds. If either has grown by more than --threshold-mb the run
+stops and prints the allocation sites that grew the most, exiting with 1.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+from the_game import Game, GameState
+from renderer import RENDERERS
+
+FRAMES_PER_STEP = 3  # Frames updated and drawn after each bot action
+CHOICES = (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4)
+TOP_ALLOCATORS = 15
+
+
+def parse_duration(text: str) -> float:
+    """'90', '90s', '15m' or '3h' to seconds"""
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    if text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def rss_mb() -> float:
+    """Current resident set size; falls back to the peak where /proc isn't available"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1 << 20)
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+
+
+class Bot:
+    """Plays full runs by teleporting the player and posting key presses"""
+
+    def __init__(self, game: Game):
+        self.game = game
+        self.playthroughs = 0
+        self.victories = 0
+        self.frames = 0
+
+    def frame(self, count: int = FRAMES_PER_STEP) -> None:
+        for _ in range(count):
+            self.game.frame(idle=False, woke=False)
+            self.frames += 1
+
+    def press(self, key: int) -> None:
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode='', scancode=0))
+        pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key, mod=0, unicode='', scancode=0))
+        self.frame()
+
+    def go_to(self, rect: pygame.Rect) -> None:
+        self.game.player.rect.center = rect.center
+        self.frame()
+
+    def give_gems(self, count: int) -> None:
+        """Top up gems when the legit ones aren't enough to finish the run"""
+        player = self.game.player
+        player.resources = max(player.resources, count)
+
+    def playthrough(self) -> None:
+        game = self.game
+        choice = CHOICES[self.playthroughs % len(CHOICES)]
+
+        self.press(pygame.K_SPACE)  # Leave the intro
+        for gem in list(game.resources):
+            self.go_to(gem.rect)
+        if game.choice_active:
+            self.press(choice)
+
+        # Maze: try a wrong exit first, then the right one
+        if game.state == GameState.ZONE_MAZE:
+            saved = game.snapshot()
+            wrong = [r for i, r in enumerate(game.exit_rects) if i != game.correct_exit]
+            if wrong:
+                self.go_to(wrong[self.playthroughs % len(wrong)])
+            game.restore(saved)
+            self.go_to(game.exit_rects[game.correct_exit])
+
+        if game.state == GameState.ZONE_RIVERBANK:
+            for gem in list(game.resources):
+                self.go_to(gem.rect)
+            for _ in range(20):
+                pending = [npc for npc in game.npcs if npc.dead or not npc.helped]
+                if not pending:
+                    break
+                npc = pending[0]
+                self.give_gems(5 if npc.dead else 1)
+                game.help_npc(npc)
+                self.frame()
+            if game.enlightenment_rect:
+                self.go_to(game.enlightenment_rect)
+
+        if game.state == GameState.VICTORY:
+            self.victories += 1
+            self.frame(30)  # Sit on the victory screen for a bit
+        self.playthroughs += 1
+        self.press(pygame.K_r)
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ])
+
+
+def top_growth(baseline: tracemalloc.Snapshot, limit: int = TOP_ALLOCATORS) -> str:
+    lines = []
+    for stat in take_snapshot().compare_to(baseline, 'lineno')[:limit]:
+        lines.append(f"  {stat.size_diff / 1024:+9.1f} KiB {stat.count_diff:+7d} blocks  {stat.traceback}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=parse_duration, default=parse_duration('10m'),
+                        help="How long to run, e.g. 600, 15m or 3h")
+    parser.add_argument('--interval', type=parse_duration, default=60.0, help="Seconds between samples")
+    parser.add_argument('--threshold-mb', type=float, default=32.0,
+                        help="Fail once RSS or traced memory grows this much past the baseline")
+    parser.add_argument('--warmup', type=int, default=20, help="Playthroughs before the baseline")
+    parser.add_argument('--renderer', choices=RENDERERS, default='software')
+    parser.add_argument('--crowd', type=int, default=0)
+    args = parser.parse_args()
+
+    tracemalloc.start(10)
+    # The game prints debug output every second; keep the soak log readable
+    log = sys.stdout
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        game = Game(renderer=args.renderer, crowd_size=args.crowd)
+        bot = Bot(game)
+        for _ in range(args.warmup):
+            bot.playthrough()
+
+        baseline = take_snapshot()
+        base_rss = rss_mb()
+        base_traced = tracemalloc.get_traced_memory()[0] / (1 << 20)
+        print(f"baseline after {bot.playthroughs} playthroughs: rss {base_rss:.1f} MB, "
+              f"traced {base_traced:.1f} MB", file=log)
+
+        start = time.perf_counter()
+        next_sample = start + args.interval
+        failed = False
+        while time.perf_counter() - start < args.duration:
+            bot.playthrough()
+            now = time.perf_counter()
+            if now < next_sample:
+                continue
+            next_sample = now + args.interval
+            rss = rss_mb()
+            traced = tracemalloc.get_traced_memory()[0] / (1 << 20)
+            print(f"{now - start:8.0f}s  playthroughs {bot.playthroughs:6d}  victories {bot.victories:6d}  "
+                  f"frames {bot.frames:8d}  rss {rss:7.1f} MB ({rss - base_rss:+.1f})  "
+                  f"traced {traced:6.1f} MB ({traced - base_traced:+.1f})", file=log, flush=True)
+            if rss - base_rss > args.threshold_mb or traced - base_traced > args.threshold_mb:
+                failed = True
+                break
+
+    if failed:
+        print(f"FAIL: memory grew more than {args.threshold_mb} MB. Top allocators since the baseline:", file=log)
+    else:
+        print(f"OK: {bot.playthroughs} playthroughs, growth stayed under {args.threshold_mb} MB. "
+              "Top allocators since the baseline:", file=log)
+    print(top_growth(baseline), file=log)
+    pygame.quit()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""Live spectator stream over a local socket.
+
+The game publishes a small state dict each tick (Broadcaster.publish is a
+single assignment). A background thread picks up the newest one, diffs it
+against the last state it sent and writes only the changed fields, as one
+JSON line per tick, to every connected viewer. Zone geometry only goes out
+when the zone changes, and new viewers get a full keyframe first. Viewers
+that can't keep up are skipped until their socket drains, then resynced
+with a keyframe, so a slow screen never slows the game or the other
+viewers.
+
+    python the_game.py --spectate localhost:8765      # or unix:/tmp/echoes.sock
+    python spectate.py localhost:8765                 # watch
+"""
+import json
+import os
+import selectors
+import socket
+import sys
+import threading
+from typing import Dict, Optional
+
+import pygame
+
+from options import SPECTATE_ADDRESS
+
+POLL_INTERVAL = 1 / 120  # How often the sender looks for a new tick (s)
+MAX_BACKLOG = 256 * 1024  # Unsent bytes before a viewer is skipped and resynced
+GEOMETRY = ('walls', 'river', 'rocks', 'exits')  # Rect lists passed by reference
+
+
+def open_socket(address: str, listen: bool) -> socket.socket:
+    """'host:port' for TCP or 'unix:/path' for a Unix socket"""
+    if address.startswith('unix:'):
+        path = address[5:]
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if listen:
+            if os.path.exists(path):
+                os.unlink(path)
+            sock.bind(path)
+        else:
+            sock.connect(path)
+    else:
+        host, _, port = address.rpartition(':')
+        if listen:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((host or 'localhost', int(port)))
+        else:
+            sock = socket.create_connection((host or 'localhost', int(port)))
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    if listen:
+        sock.listen()
+    return sock
+
+
+def rect_list(rects) -> list:
+    return [tuple(r) for r in rects or ()]
+
+
+class Viewer:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.backlog = bytearray()
+        self.needs_keyframe = True
+
+
+class Broadcaster:
+    """Sends published states to every connected spectator from its own thread"""
+
+    def __init__(self, address: str = SPECTATE_ADDRESS):
+        self.address = address
+        self.server = open_socket(address, listen=True)
+        self.server.setblocking(False)
+        self.latest: Optional[Dict] = None
+        self.tick = 0
+        self.sent_state: Dict = {}
+        self.geometry_cache: Dict[str, tuple] = {}  # field -> (source list, converted)
+        self.viewers = []
+        self.bytes_sent = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, name='spectate', daemon=True)
+        self.thread.start()
+
+    def publish(self, state: Dict) -> None:
+        """Hand over this tick's state; only the newest one is ever encoded"""
+        self.latest = state
+
+    def close(self) -> None:
+        self.running = False
+        self.thread.join(1.0)
+        for viewer in self.viewers:
+            viewer.sock.close()
+        self.server.close()
+        if self.address.startswith('unix:') and os.path.exists(self.address[5:]):
+            os.unlink(self.address[5:])
+
+    def _plain(self, state: Dict) -> Dict:
+        """Turn referenced rect lists into tuples, converting each list only once"""
+        plain = dict(state)
+        for field in GEOMETRY:
+            source = state.get(field)
+            cached = self.geometry_cache.get(field)
+            if cached is None or cached[0] is not source:
+                cached = self.geometry_cache[field] = (source, rect_list(source))
+            plain[field] = cached[1]
+        return plain
+
+    def _encode(self, state: Dict) -> None:
+        state = self._plain(state)
+        self.tick += 1
+        sent = self.sent_state
+        changed = {key: value for key, value in state.items() if key not in sent or sent[key] != value}
+        self.sent_state = state
+        delta = None
+        keyframe = None
+        for viewer in self.viewers:
+            if viewer.needs_keyframe:
+                if keyframe is None:
+                    keyframe = (json.dumps({'tick': self.tick, 'key': True, 'set': state},
+                                           separators=(',', ':')) + '\n').encode()
+                viewer.backlog += keyframe
+                viewer.needs_keyframe = False
+            elif changed:
+                if delta is None:
+                    delta = (json.dumps({'tick': self.tick, 'set': changed},
+                                        separators=(',', ':')) + '\n').encode()
+                viewer.backlog += delta
+
+    def _send(self, viewer: Viewer) -> bool:
+        """Write what the socket takes without blocking; False if the viewer left"""
+        try:
+            sent = viewer.sock.send(viewer.backlog)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            return False
+        del viewer.backlog[:sent]
+        self.bytes_sent += sent
+        if len(viewer.backlog) > MAX_BACKLOG:
+            # Too far behind: drop what's queued and start over from a keyframe
+            viewer.backlog.clear()
+            viewer.needs_keyframe = True
+        return True
+
+    def _serve(self) -> None:
+        selector = selectors.DefaultSelector()
+        selector.register(self.server, selectors.EVENT_READ)
+        encoded = None
+        while self.running:
+            for _ in selector.select(POLL_INTERVAL):
+                try:
+                    sock, _ = self.server.accept()
+                except OSError:
+                    continue
+                sock.setblocking(False)
+                if sock.family != socket.AF_UNIX:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.viewers.append(Viewer(sock))
+
+            latest = self.latest
+            if latest is not None and latest is not encoded:
+                encoded = latest
+                self._encode(latest)
+
+            alive = []
+            for viewer in self.viewers:
+                if not viewer.backlog or self._send(viewer):
+                    alive.append(viewer)
+                else:
+                    viewer.sock.close()
+            self.viewers = alive
+        selector.close()
+
+
+def spectator_main(address: str) -> None:
+    """Connect to a broadcaster and draw the session from its stream"""
+    os.environ.setdefault('SDL_VIDEO_WINDOW_POS', '40,40')
+    from the_game import (SCREEN_WIDTH, SCREEN_HEIGHT, BLACK, WHITE, GameState, NPC, Player, Resource)
+    from camera import Camera
+    from renderer import create_renderer
+    import startup
+
+    startup.require('font')
+
+    renderer = create_renderer('software', (SCREEN_WIDTH, SCREEN_HEIGHT), "Echoes of Humanity - spectator")
+    font = pygame.font.Font(None, 24)
+    camera = Camera((SCREEN_WIDTH, SCREEN_HEIGHT))
+    player = Player(0, 0)
+    gem = Resource(0, 0)
+    npcs = {}
+
+    sock = open_socket(address, listen=False)
+    sock.setblocking(False)
+    buffer = b''
+    state: Dict = {}
+    clock = pygame.time.Clock()
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                return
+
+        # Apply every delta that has arrived
+        try:
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    print("Broadcaster closed the stream")
+                    return
+                buffer += chunk
+        except BlockingIOError:
+            pass
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            message = json.loads(line)
+            if message.get('key'):
+                state = {}
+            state.update(message['set'])
+            if 'walls' in message['set'] or 'exits' in message['set']:
+                world = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+                world.unionall_ip([pygame.Rect(r) for r in state['walls'] + state['exits']] or [world])
+                camera.set_world(world)
+
+        renderer.clear(BLACK)
+        if state:
+            game_state = GameState(state['state'])
+            player.rect = pygame.Rect(state['player'])
+            camera.follow(player.rect)
+            renderer.offset = camera.offset
+            if game_state == GameState.ZONE_RIVERBANK:
+                for rect in state['river']:
+                    renderer.fill_rect((0, 100, 200), rect)
+                for rect in state['rocks']:
+                    renderer.fill_rect((100, 100, 100), rect)
+            else:
+                for rect in state['walls']:
+                    renderer.fill_rect(WHITE, rect)
+            for rect in state['exits']:
+                renderer.draw_rect(WHITE, rect, 1)
+            for pos in state['gems']:
+                renderer.blit(gem.sprite, pos)
+            if state['enlightenment']:
+                renderer.circle((255, 255, 0), pygame.Rect(state['enlightenment']).center,
+                                state['enlightenment'][2] // 2)
+            for npc_type, x, y, dead, helped, needs_help, given, required in state['npcs']:
+                npc = npcs.get(npc_type) or npcs.setdefault(npc_type, NPC(x, y, npc_type=npc_type))
+                npc.rect.topleft = (x, y)
+                npc.dead, npc.helped, npc.needs_help = dead, helped, needs_help
+                npc.gems_given, npc.gems_required = given, required
+                npc.update_sprite()
+                npc.draw(renderer, font)
+            player.draw(renderer)
+            renderer.offset = (0, 0)
+
+            status = f"{game_state.name.replace('_', ' ').title()}  |  gems held: {state['gems_held']}"
+            renderer.blit(renderer.text_surface(font, status, WHITE), (10, SCREEN_HEIGHT - 30))
+            for i, line in enumerate(state['message'].split('\n')):
+                renderer.blit(renderer.text_surface(font, line, WHITE), (10, 10 + i * 25))
+        else:
+            renderer.blit(renderer.text_surface(font, f"Waiting for {address} ...", WHITE), (10, 10))
+        renderer.present()
+        clock.tick(60)
+
+
+if __name__ == '__main__':
+    try:
+        spectator_main(sys.argv[1] if len(sys.argv) > 1 else SPECTATE_ADDRESS)
+    except ConnectionRefusedError:
+        print("No game is broadcasting there; start one with --spectate")
+    finally:
+        pygame.quit()
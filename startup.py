@@ -0,0 +1,99 @@
+"""Startup helpers: lazy pygame subsystem init and a startup-time report.
+
+Import this before anything else touches pygame so the report's clock starts
+as early as possible.
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+
+STARTUP_BEGIN = time.perf_counter()
+
+# pygame.pkgdata imports pkg_resources (well over 100 ms) only to locate the
+# default font, and falls back to a plain file lookup without it. Hide it for
+# the duration of the pygame import only; the previous sys.modules entry is
+# put back straight after, so later imports of pkg_resources work as usual.
+_MISSING = object()
+_pkg_resources = sys.modules.get('pkg_resources', _MISSING)
+if _pkg_resources is _MISSING:
+    sys.modules['pkg_resources'] = None
+try:
+    import pygame
+finally:
+    if _pkg_resources is _MISSING:
+        sys.modules.pop('pkg_resources', None)
+del _pkg_resources
+
+# Subsystems we bring up on demand instead of calling pygame.init()
+SUBSYSTEMS = {
+    'display': (pygame.display.get_init, pygame.display.init),
+    'font': (pygame.font.get_init, pygame.font.init),
+    'mixer': (pygame.mixer.get_init, pygame.mixer.init),
+}
+
+
+class StartupReport:
+    """Collects timestamps from process start up to the first presented frame"""
+
+    def __init__(self):
+        self.enabled = False
+        self.marks = []
+        self.printed = False
+
+    def mark(self, label: str) -> None:
+        self.marks.append((label, time.perf_counter() - STARTUP_BEGIN))
+
+    def first_frame(self) -> None:
+        """Call after each present; records and prints the report only once"""
+        if self.printed:
+            return
+        self.printed = True
+        self.mark('first frame')
+        if self.enabled:
+            print(self.format())
+
+    def format(self) -> str:
+        lines = ["Startup timeline (ms since first import):"]
+        for label, t in self.marks:
+            lines.append(f"  {t * 1000:8.1f}  {label}")
+        if not getattr(sys, 'frozen', False):
+            total, slowest = import_breakdown()
+            lines.append(f"Importing the_game: {total / 1000:.1f} ms in all (-X importtime); slowest modules, self ms:")
+            for name, self_time in slowest:
+                lines.append(f"  {self_time / 1000:8.1f}  {name}")
+        return "\n".join(lines)
+
+
+def require(*names: str) -> None:
+    """Initialise the named pygame subsystems if they aren't up yet"""
+    for name in names:
+        get_init, init = SUBSYSTEMS[name]
+        if not get_init():
+            init()
+            report.mark(f"{name} init")
+
+
+def import_breakdown(module: str = 'the_game', top: int = 10):
+    """Import a module in a fresh interpreter under -X importtime.
+
+    Returns (cumulative microseconds for the module, [(name, self
+    microseconds)] for the top modules by self time, which is where the
+    budget actually goes).
+    """
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                         capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    entries = []
+    total = 0
+    for line in out.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)', line)
+        if match:
+            entries.append((match.group(3), int(match.group(1))))
+            if match.group(3) == module:
+                total = int(match.group(2))
+    entries.sort(key=lambda entry: entry[1], reverse=True)
+    return total, entries[:top]
+
+
+report = StartupReport()
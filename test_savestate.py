@@ -0,0 +1,39 @@
+"""Snapshots round-trip, and damaged ones are rejected with ValueError"""
+import os
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import savestate
+from the_game import Game, GameState
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    game = Game(audio=False, asset_pack=None)
+    game.state = GameState.ZONE_SCARCITY
+    game.setup_zones()
+    data = game.snapshot()
+    game.shutdown()
+    return data
+
+
+def test_round_trip(snapshot):
+    assert savestate.pack(savestate.unpack(snapshot)) == snapshot
+
+
+@pytest.mark.parametrize('cut', [3, 10, 43, 85, -1])
+def test_truncated_snapshot_raises_value_error(snapshot, cut):
+    with pytest.raises(ValueError):
+        savestate.unpack(snapshot[:cut])
+
+
+def test_restore_truncated_snapshot_keeps_session(snapshot):
+    game = Game(audio=False, asset_pack=None)
+    game.restore(snapshot)
+    with pytest.raises(ValueError):
+        game.restore(snapshot[:len(snapshot) // 2])
+    assert game.snapshot() == snapshot
+    game.shutdown()
@@ -1,3 +1,4 @@
+import startup  # Must come first: starts the startup clock and imports pygame
 import pygame
 import sys
 import math
@@ -7,14 +8,37 @@ from typing import List, Tuple, Optional
 import time
 import os
 
-# Initialize Pygame
-pygame.init()
+import savestate
+from mazegen import generate_maze
+from camera import Camera, SpatialGrid, TileCache
+from particles import ParticleSystem
+from audio import Audio
+from analytics import Analytics
+from latency import PACING_MODES, FramePacer, LatencyTracker
+from renderer import RENDERERS, create_renderer
+# Optional features (crowd, lighting, water, pathfind, spectate, record,
+# assets) are imported where they're switched on, so they cost
+# nothing at startup when they're off
 
 # Constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 PLAYER_SPEED = 3  # Reduced from 5 to 3 for better control
 TILE_SIZE = 32
+INTRO_DURATION = 3000  # Milliseconds before the intro moves on by itself
+QUICKSAVE_PATH = 'quicksave.eoh'
+ASSET_PACK = 'assets.pack'  # Built by python assets.py
+MAZE_CELL_MIN = 44  # Smallest generated maze cell the 32px player fits through
+MAZE_WALL_THICKNESS = 8
+MAZE_SIZE_MIN = 3  # In a 2x2 maze the correct exit can be in the start cell
+CLICK_MOVE_STEP = 4  # Click-to-move covers what a held key does per frame (in units of speed)
+# Nudges tried, nearest first, to fit the player on a click-to-move waypoint
+FIT_OFFSETS = sorted(((dx, dy) for dx in range(-12, 13) for dy in range(-12, 13)),
+                     key=lambda d: d[0] * d[0] + d[1] * d[1])
+IDLE_MAX_WAIT = 1000  # Longest we block on static screens before checking timers again (ms)
+IDLE_POLL = 0.01  # How often run_async checks for input while idle (s)
+# Events that can wake the game from idle; everything else is kept off the queue
+IDLE_EVENTS = [pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED]
 
 # Colors
 BLACK = (0, 0, 0)
@@ -24,6 +48,8 @@ BROWN = (139, 69, 19)
 BLUE = (0, 0, 255)
 GREEN = (0, 128, 0)
 RED = (255, 0, 0)
+GEM_GLOW = (120, 255, 120)
+ENLIGHTENMENT_GLOW = (255, 255, 120)
 
 class GameState(Enum):
     INTRO = 1
@@ -32,6 +58,10 @@ class GameState(Enum):
     ZONE_RIVERBANK = 4
     VICTORY = 5
 
+# Baked sprites shared by every object in the same visual state, so restarts
+# and state changes don't redraw them
+SPRITE_CACHE = {}
+
 class Resource:
     def __init__(self, x: int, y: int):
         self.rect = pygame.Rect(x, y, 24, 24)
@@ -40,14 +70,17 @@ class Resource:
         self.load_sprite()
     
     def load_sprite(self):
-        # Create a simple green circle surface for the resource
-        sprite_size = 24
-        self.sprite = pygame.Surface((sprite_size, sprite_size), pygame.SRCALPHA)
-        pygame.draw.circle(self.sprite, GREEN, (sprite_size//2, sprite_size//2), 10)
-        
-    def draw(self, screen):
+        self.sprite = SPRITE_CACHE.get('gem')
+        if self.sprite is None:
+            # Create a simple green circle surface for the resource
+            sprite_size = 24
+            self.sprite = pygame.Surface((sprite_size, sprite_size), pygame.SRCALPHA)
+            pygame.draw.circle(self.sprite, GREEN, (sprite_size//2, sprite_size//2), 10)
+            SPRITE_CACHE['gem'] = self.sprite
+        
+    def draw(self, renderer):
         if not self.collected and self.sprite:
-            screen.blit(self.sprite, self.rect.topleft)
+            renderer.blit(self.sprite, self.rect.topleft)
 
 class NPC:
     def __init__(self, x: int, y: int, needs_help: bool = False, npc_type: str = 'generic'):
@@ -62,6 +95,14 @@ class NPC:
         self.update_sprite()
     
     def update_sprite(self):
+        key = ('npc', self.npc_type, self.dead, self.helped, self.needs_help,
+               self.gems_given, self.gems_required)
+        self.sprite = SPRITE_CACHE.get(key)
+        if self.sprite is None:
+            self.bake_sprite()
+            SPRITE_CACHE[key] = self.sprite
+    
+    def bake_sprite(self):
         # Create a more detailed NPC sprite based on type and state
         sprite_size = 32
         self.sprite = pygame.Surface((sprite_size, sprite_size), pygame.SRCALPHA)
@@ -74,7 +115,7 @@ class NPC:
             return
             
         # Draw a humanoid figure
-        if self.npc_type == 'elder' or self.npc_type == 'child':
+        if self.npc_type in ('elder', 'child', 'stranger'):
             # Body color is red if needs help, green if helped, gray if neither
             if self.helped:
                 body_color = (0, 200, 0)  # Green when helped
@@ -110,10 +151,10 @@ class NPC:
             pygame.draw.line(self.sprite, body_color, 
                             (sprite_size//2 + 2, leg_y), (sprite_size//2 + 6, sprite_size - 4), 3)
     
-    def draw(self, screen, font):
+    def draw(self, renderer, font):
         # Draw the NPC sprite
         if self.sprite:
-            screen.blit(self.sprite, self.rect.topleft)
+            renderer.blit(self.sprite, self.rect.topleft)
         
         # Add label above NPC if not dead
         if not self.dead:
@@ -125,8 +166,8 @@ class NPC:
             else:
                 status = self.npc_type.capitalize()
                 
-            label = font.render(status, True, WHITE)
-            screen.blit(label, (self.rect.x - 10, self.rect.y - 25))
+            label = renderer.text_surface(font, status, WHITE)
+            renderer.blit(label, (self.rect.x - 10, self.rect.y - 25))
 
 class Player:
     def __init__(self, x: int, y: int):
@@ -147,6 +188,13 @@ class Player:
         self.sprite = None
         self.load_sprite()
     
+    def reset(self, x: int, y: int):
+        """Start over at a position with no gems, keeping the sprite"""
+        self.x = x
+        self.y = y
+        self.resources = 0
+        self.rect.topleft = (x, y)
+    
     def get_speed(self):
         """Calculate current speed based on number of magic gems held.
         Speed increases by 0.5 per gem.
@@ -159,9 +207,12 @@ class Player:
         return self.base_speed + (self.speed_increase_per_gem * self.resources)
     
     def load_sprite(self):
+        self.sprite = SPRITE_CACHE.get('player')
+        if self.sprite is not None:
+            return
         # Create a more detailed player sprite (gray humanoid as shown in the image)
         sprite_size = 32
-        self.sprite = pygame.Surface((sprite_size, sprite_size), pygame.SRCALPHA)
+        self.sprite = SPRITE_CACHE['player'] = pygame.Surface((sprite_size, sprite_size), pygame.SRCALPHA)
         
         # Draw a humanoid figure in gray
         body_color = GRAY
@@ -189,7 +240,7 @@ class Player:
         pygame.draw.line(self.sprite, body_color, 
                         (sprite_size//2 + 2, leg_y), (sprite_size//2 + 6, sprite_size - 4), 3)
     
-    def move(self, dx: int, dy: int, walls: List[pygame.Rect]):
+    def move(self, dx: int, dy: int, walls: List[pygame.Rect], bounds: Optional[pygame.Rect] = None):
         # Get current speed based on gems
         speed = self.get_speed()
         
@@ -226,9 +277,8 @@ class Player:
                         self.rect.top = wall.bottom
                     break
         
-        # Ensure player stays within screen bounds
-        self.rect.x = max(0, min(SCREEN_WIDTH - self.rect.width, self.rect.x))
-        self.rect.y = max(0, min(SCREEN_HEIGHT - self.rect.height, self.rect.y))
+        # Ensure player stays within the world (the screen unless the zone is bigger)
+        self.rect.clamp_ip(bounds or pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
         
         # Update position variables
         self.x = self.rect.x
@@ -255,13 +305,40 @@ class Player:
         
         return collected_resource, all_collected
     
-    def draw(self, screen):
+    def draw(self, renderer):
         if self.sprite:
-            screen.blit(self.sprite, self.rect.topleft)
+            renderer.blit(self.sprite, self.rect.topleft)
+
+class HeldKeys(frozenset):
+    """Key state for Game.held_keys: keys[pygame.K_w] is True while W is held"""
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self
 
 class Game:
+    def generated_maze(self):
+        """The Maze for maze_size and maze_seed (generate_maze caches it)"""
+        cells = self.maze_size
+        cell_size = max(MAZE_CELL_MIN, min(SCREEN_WIDTH, SCREEN_HEIGHT) // (cells + 1))
+        width = cells * cell_size + MAZE_WALL_THICKNESS
+        origin = (max(0, (SCREEN_WIDTH - width) // 2), max(0, (SCREEN_HEIGHT - width) // 2))
+        return generate_maze(cells, cells, self.maze_seed, cell_size, MAZE_WALL_THICKNESS, origin)
+
+    def create_generated_maze(self) -> List[pygame.Rect]:
+        """Create a seeded maze of maze_size x maze_size cells (see mazegen.py).
+        
+        Small mazes are scaled to fill the screen; big ones keep MAZE_CELL_MIN
+        cells and extend past it.
+        """
+        self.maze = self.generated_maze()
+        self.exit_rects = [pygame.Rect(r) for r in self.maze.exit_rects]
+        self.correct_exit = self.maze.correct_exit
+        return [pygame.Rect(r) for r in self.maze.walls]
+        
     def create_maze_zone(self) -> List[pygame.Rect]:
         """Create a structured maze with connected walls and 4 distinct exits."""
+        if self.maze_size:
+            return self.create_generated_maze()
         walls = []
         wall_thickness = 15
         
@@ -340,12 +417,82 @@ class Game:
         
         return walls
     
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Echoes of Humanity")
+    def __init__(self, renderer: str = 'software', idle_mode: bool = True,
+                 maze_size: Optional[int] = None, maze_seed: int = 0, crowd_size: int = 0,
+                 audio: bool = True, analytics_dir: Optional[str] = None, pacing: str = 'default',
+                 spectate: Optional[str] = None, record: Optional[str] = None, record_format: str = 'png',
+                 asset_pack: Optional[str] = ASSET_PACK,
+                 lighting: bool = True, water: bool = True):
+        # Things that survive a restart: the window, clock, fonts and player sprite
+        self.renderer = create_renderer(renderer, (SCREEN_WIDTH, SCREEN_HEIGHT), "Echoes of Humanity")
+        self.screen = self.renderer.screen
         self.clock = pygame.time.Clock()
-        self.state = GameState.INTRO
+        self.pacer = FramePacer(pacing, self.clock)
+        self.latency = LatencyTracker()
+        self.latency_report = False  # Print percentiles when run() returns
+        self.pending_save = None  # Quicksave bytes not yet written to disk
+        self.broadcaster = None
+        if spectate:
+            from spectate import Broadcaster
+            self.broadcaster = Broadcaster(spectate)
+        self.recorder = None
+        if record:
+            from record import Recorder
+            self.recorder = Recorder(record, (SCREEN_WIDTH, SCREEN_HEIGHT), record_format)
+        self.defer_saves = False
+        self.last_view = None
+        self.idle_mode = idle_mode  # Block instead of spinning on static screens
+        self.maze_size = maze_size  # None keeps the hand-made Zone 2 layout
+        self.maze_seed = maze_seed
+        self.maze = None
+        self.crowd_size = crowd_size  # Wandering strangers added to the riverbank
+        self.lighting_enabled = lighting  # Fog of war in Zone 1
+        self.lighting = None
+        self.water_enabled = water  # Animated river in Zone 3
+        self.water = None
+        self.nav = None  # Click-to-move grid, rebuilt from the walls with the world
+        self.route = None  # Path search still in progress
+        self.waypoints = []  # Where a click is taking the player, next one last
+        self.nudge = None  # Last detour follow_route added round a wall
+        if maze_size is not None and maze_size < MAZE_SIZE_MIN:
+            raise ValueError(f"maze_size must be at least {MAZE_SIZE_MIN}, got {maze_size}")
+        if maze_size:
+            # Build the maze now so entering Zone 2 just picks it up from the cache
+            self.create_generated_maze()
+        self.events_restricted = False
+        self.held_keys = None  # A HeldKeys that stands in for the keyboard (bots, gymenv.py)
+        startup.require('font')
+        self.fonts = {}
+        self.font = self.get_font(24)
+        self.assets = None  # Pre-rendered sprites and text (python assets.py)
+        if asset_pack:
+            from assets import load_pack
+            self.assets = load_pack(asset_pack)
+        if self.assets:
+            SPRITE_CACHE.update(self.assets.sprites)
+            for size, text, color, surface in self.assets.texts:
+                self.renderer.packed_text[(self.get_font(size), text, color)] = surface
         self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        self.camera = Camera((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.particles = ParticleSystem()
+        self.audio = Audio(enabled=audio)
+        self.analytics = Analytics(analytics_dir)
+        self.analytics.track('session_start', renderer=self.renderer.name, maze_size=maze_size, crowd=crowd_size)
+        self.tracked_state = None
+        self.state_entered = 0.0
+        self.static_tiles = TileCache(self.bake_static_tile)
+        self.reset()
+        
+    def reset(self):
+        """Put the game back to a fresh intro without touching the display.
+        
+        Only plain state is reassigned here, so restarting is cheap enough to
+        do thousands of times in automated runs.
+        """
+        self.state = GameState.INTRO
+        self.intro_started = pygame.time.get_ticks()
+        self.playthrough_started = time.perf_counter()
+        self.player.reset(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
         self.walls = []
         self.resources = []
         self.npcs = []
@@ -355,7 +502,6 @@ class Game:
         self.choice_made = None
         self.saved_npc_type = None  # Tracks which NPC was saved in Zone 1
         self.revived_npc = False    # Tracks if the dead NPC was revived in Zone 3
-        self.font = pygame.font.Font(None, 24)
         self.exit_rects = []
         self.correct_exit = 0
         self.river = None
@@ -363,8 +509,130 @@ class Game:
         self.goal = None
         self.enlightenment_rect = None
         self.victory_shown = False
-        self.setup_zones()
-        self.position_player_in_safe_area()
+        self.checkpoints = {}  # GameState -> snapshot taken on entering that zone
+        self.crowd = None
+        self.particles.clear()
+        self.rebuild_world()
+        # Zones are built when leaving the intro, so the first frame shows up quickly
+        
+    def snapshot(self) -> bytes:
+        """Capture the whole session as compact bytes (see savestate.py)"""
+        def rect_tuple(rect):
+            return None if rect is None else (rect.x, rect.y, rect.width, rect.height)
+        
+        return savestate.pack({
+            'state': self.state.value,
+            'choice_made': self.choice_made,
+            'saved_npc_type': self.saved_npc_type,
+            'choice_active': self.choice_active,
+            'revived_npc': self.revived_npc,
+            'victory_shown': self.victory_shown,
+            'correct_exit': self.correct_exit,
+            'message_timer': self.message_timer,
+            'player': (self.player.rect.x, self.player.rect.y, self.player.resources),
+            'enlightenment_rect': rect_tuple(self.enlightenment_rect),
+            'goal': rect_tuple(self.goal),
+            'walls': [rect_tuple(r) for r in self.walls],
+            'exit_rects': [rect_tuple(r) for r in self.exit_rects],
+            'river': None if self.river is None else [rect_tuple(r) for r in self.river],
+            'rocks': [rect_tuple(r) for r in self.rocks],
+            'npcs': [(n.rect.x, n.rect.y, n.npc_type, n.needs_help, n.helped, n.dead,
+                      n.gems_given, n.gems_required) for n in self.npcs],
+            'resources': [(r.rect.x, r.rect.y, r.collected) for r in self.resources],
+            'messages': self.messages,
+        })
+        
+    def restore(self, data: bytes):
+        """Replace the session with one captured by snapshot().
+        
+        Cheap enough that bots can fork many runs from one mid-game snapshot.
+        """
+        session = savestate.unpack(data)
+        self.state = GameState(session['state'])
+        self.intro_started = pygame.time.get_ticks()
+        self.choice_made = session['choice_made']
+        self.saved_npc_type = session['saved_npc_type']
+        self.choice_active = session['choice_active']
+        self.revived_npc = session['revived_npc']
+        self.victory_shown = session['victory_shown']
+        self.correct_exit = session['correct_exit']
+        self.message_timer = session['message_timer']
+        self.messages = list(session['messages'])
+        
+        x, y, gems = session['player']
+        self.player.reset(x, y)
+        self.player.resources = gems
+        
+        self.enlightenment_rect = session['enlightenment_rect'] and pygame.Rect(session['enlightenment_rect'])
+        self.goal = session['goal'] and pygame.Rect(session['goal'])
+        self.walls = [pygame.Rect(r) for r in session['walls']]
+        self.exit_rects = [pygame.Rect(r) for r in session['exit_rects']]
+        self.river = None if session['river'] is None else [pygame.Rect(r) for r in session['river']]
+        self.rocks = [pygame.Rect(r) for r in session['rocks']]
+        
+        self.npcs = []
+        for x, y, npc_type, needs_help, helped, dead, gems_given, gems_required in session['npcs']:
+            npc = NPC(x, y, needs_help, npc_type)
+            npc.helped = helped
+            npc.dead = dead
+            npc.gems_given = gems_given
+            npc.gems_required = gems_required
+            npc.update_sprite()
+            self.npcs.append(npc)
+        
+        self.resources = []
+        for x, y, collected in session['resources']:
+            gem = Resource(x, y)
+            gem.collected = collected
+            self.resources.append(gem)
+
+        # The crowd isn't saved: drop the old zone's strangers and effects and
+        # bring a fresh crowd to the riverbank, as entering it would
+        self.crowd = None
+        self.particles.clear()
+        if self.state == GameState.ZONE_RIVERBANK and self.crowd_size:
+            from crowd import Crowd
+            self.crowd = Crowd(self.crowd_size, pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), self.walls,
+                               lambda x, y: NPC(x, y, needs_help=True, npc_type='stranger'))
+        self.rebuild_world()
+            
+    def quicksave(self):
+        """Save the session to QUICKSAVE_PATH (later, when run_async is writing saves)"""
+        self.pending_save = self.snapshot()
+        if not self.defer_saves:
+            self.write_pending_save()
+        self.show_message("Game saved.", 60)
+    
+    def write_pending_save(self):
+        if self.pending_save is None:
+            return
+        # Write beside it and swap, so a crash mid-write can't leave a truncated save
+        with open(QUICKSAVE_PATH + '.tmp', 'wb') as f:
+            f.write(self.pending_save)
+        os.replace(QUICKSAVE_PATH + '.tmp', QUICKSAVE_PATH)
+        self.pending_save = None
+        
+    def quickload(self):
+        """Load the quicksave, or the latest zone checkpoint if there isn't one"""
+        try:
+            data = self.pending_save
+            if data is None:
+                with open(QUICKSAVE_PATH, 'rb') as f:
+                    data = f.read()
+            self.restore(data)
+            self.show_message("Game loaded.", 60)
+            return
+        except (OSError, ValueError) as e:
+            print(f"Could not load quicksave: {e}")
+        if self.checkpoints:
+            self.restore(self.checkpoints[max(self.checkpoints, key=lambda s: s.value)])
+            self.show_message("Returned to the last checkpoint.", 60)
+        
+    def get_font(self, size: int) -> pygame.font.Font:
+        """Load the default font at a given size the first time it's needed"""
+        if size not in self.fonts:
+            self.fonts[size] = pygame.font.Font(None, size)
+        return self.fonts[size]
         
     def create_riverbank_zone(self):
         """Create the riverbank environment for Zone 3"""
@@ -468,6 +736,7 @@ class Game:
     def setup_zones(self):
         """Set up the game zones based on the current state"""
         # Clear existing objects but keep NPCs
+        self.crowd = None
         self.walls = []
         self.resources = []
         self.exit_rects = []
@@ -511,10 +780,14 @@ class Game:
         elif self.state == GameState.ZONE_MAZE:
             # Create Zone 2 - The Maze
             self.walls = self.create_maze_zone()
-            # Position player in the center of the maze
-            self.player.rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-            # Ensure player is not in a wall or exit
-            self.position_player_in_safe_area()
+            if self.maze_size:
+                # Generated mazes have an open start cell in the middle
+                self.player.rect.center = self.maze.start
+            else:
+                # Position player in the center of the maze
+                self.player.rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+                # Ensure player is not in a wall or exit
+                self.position_player_in_safe_area()
             self.show_message("Find the correct exit to proceed to the next zone!", 180)
             
             # Store NPCs temporarily but don't display them in Zone 2
@@ -556,11 +829,23 @@ class Game:
                 if self.find_safe_position(gem.rect, 24):
                     gem.load_sprite()  # Make sure the sprite is loaded
                     self.resources.append(gem)
+            
+            # Optional crowd of wandering strangers who also need gems
+            if self.crowd_size:
+                from crowd import Crowd
+                self.crowd = Crowd(self.crowd_size, pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), self.walls,
+                                   lambda x, y: NPC(x, y, needs_help=True, npc_type='stranger'))
         
         else:
             # Default to Zone 1 if no valid state
             self.state = GameState.ZONE_SCARCITY
             self.setup_zones()
+            return
+        
+        self.rebuild_world()
+        
+        # Auto-checkpoint on every zone entry
+        self.checkpoints[self.state] = self.snapshot()
 
     def create_scarcity_zone(self) -> List[pygame.Rect]:
         """Create the exact layout for Zone 1 with walls, NPCs, and resources"""
@@ -698,6 +983,9 @@ class Game:
                 
                 self.show_message(message, 120)
                 npc.update_sprite()
+                self.particles.trail(self.player.rect.center, npc.rect.center, GEM_GLOW, count=200)
+                self.audio.play('npc_revival')
+                self.analytics.track('npc_revived', npc=npc.npc_type, gems=revival_cost)
                 
                 # Check if both NPCs have been revived
                 if all(not n.dead for n in self.npcs):
@@ -732,6 +1020,8 @@ class Game:
                 )
             
             npc.update_sprite()
+            self.particles.trail(self.player.rect.center, npc.rect.center, GEM_GLOW)
+            self.audio.play('gem_given')
             
             # Check if both NPCs have been fully helped
             living_npcs = [n for n in self.npcs if not n.dead]
@@ -757,10 +1047,16 @@ class Game:
         return False
 
     def handle_events(self):
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        self.latency.stamp(events)
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
             
+            # Touchscreens send taps as left clicks too
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.click_to_move(event.pos)
+            
             if event.type == pygame.KEYDOWN:
                 # Space bar to transition from intro to Zone 1
                 if event.key == pygame.K_SPACE and self.state == GameState.INTRO:
@@ -819,17 +1115,28 @@ class Game:
                     
                     # After any choice in Zone 1, transition to Zone 2 (the maze)
                     if self.choice_made:
+                        self.analytics.track('choice_made', choice=self.choice_made, gems_kept=self.player.resources)
+                        if self.choice_made != 'both':
+                            self.audio.play('npc_death')
                         self.state = GameState.ZONE_MAZE
                         self.setup_zones()
                         self.show_message("You feel a strange force pulling you into a mysterious maze...", 180)
                 
+                # Quicksave / quickload
+                if event.key == pygame.K_F5 and self.state != GameState.INTRO:
+                    self.quicksave()
+                elif event.key == pygame.K_F9:
+                    self.quickload()
+                    return True
+                
                 # Restart game with R key
                 if event.key == pygame.K_r:
-                    self.__init__()  # Restart the game
+                    self.analytics.track('restart', state=self.state.name)
+                    self.reset()  # Restart the game
                     return True  # Return True to continue running
         
         # Handle continuous key presses for movement
-        keys = pygame.key.get_pressed()
+        keys = self.pressed_keys()
         
         # Debug info occasionally
         frame_count = pygame.time.get_ticks() // 16  # Approximate frame count
@@ -853,10 +1160,82 @@ class Game:
             
             # Move the player if there's input
             if dx != 0 or dy != 0:
-                self.player.move(dx, dy, self.walls)
+                self.player.move(dx, dy, self.nearby_walls(), self.camera.world)
         
         return True
     
+    def click_to_move(self, pos: Tuple[int, int]):
+        """Start walking to a clicked screen position"""
+        if self.state in (GameState.INTRO, GameState.VICTORY) or self.victory_shown or self.choice_active:
+            return
+        self.route = self.nav.route(self.player.rect.center, self.camera.to_world(pos))
+        self.waypoints = []
+        self.nudge = None
+        self.follow_route()
+
+    def follow_route(self):
+        """Walk along the clicked path, searching a bit further first if it isn't ready"""
+        if self.route is not None:
+            if not self.route.advance():
+                return  # Long route; carry on searching next frame
+            self.waypoints = list(reversed(self.route.path or ()))
+            self.route = None
+            self.fit_waypoint()
+        slack = self.nav.cell // 2
+        x, y = self.player.rect.center
+        while self.waypoints:
+            tx, ty = self.waypoints[-1]
+            if abs(tx - x) > slack or abs(ty - y) > slack:
+                break
+            self.waypoints.pop()
+            self.fit_waypoint()
+        if not self.waypoints:
+            return
+        # The same top distance per frame as a held key (handle_events moves 3, update 1),
+        # but no further than the waypoint
+        speed = self.player.get_speed()
+        dx = max(-CLICK_MOVE_STEP, min(CLICK_MOVE_STEP, (tx - x) / speed))
+        dy = max(-CLICK_MOVE_STEP, min(CLICK_MOVE_STEP, (ty - y) / speed))
+        before = self.player.rect.topleft
+        self.player.move(dx, dy, self.nearby_walls(), self.camera.world)
+        if self.player.rect.topleft != before:
+            return
+        # Blocked: the line between cell middles runs too close to a wall for the
+        # whole player. Go round by the nearest spot it fits a cell further on
+        cell = self.nav.cell
+        ahead = self.fit_point((x + cell * ((tx > x) - (tx < x)), y + cell * ((ty > y) - (ty < y))))
+        if ahead is None or ahead == (x, y) or (tx, ty) == self.nudge:
+            self.waypoints = []  # Really stuck
+        else:
+            self.waypoints.append(ahead)
+            self.nudge = ahead
+
+    def fit_waypoint(self):
+        """Move the next waypoint to the closest spot the whole player fits.
+        
+        Grid cells are half the player's size, so a cell's middle can be too
+        close to a wall for the player to stand on, e.g. at a corridor corner.
+        """
+        if self.waypoints:
+            self.waypoints[-1] = self.fit_point(self.waypoints[-1]) or self.waypoints[-1]
+
+    def fit_point(self, point: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """Nearest player center to point (within 12 pixels) clear of every wall"""
+        rect = self.player.rect.copy()
+        rect.center = point
+        walls = self.wall_grid.query(rect.inflate(64, 64))
+        for dx, dy in FIT_OFFSETS:
+            rect.center = (point[0] + dx, point[1] + dy)
+            if rect.collidelist(walls) == -1:
+                return rect.center
+        return None
+
+    def pressed_keys(self):
+        """Which keys are held: the keyboard, or held_keys when something else is playing"""
+        if self.held_keys is not None:
+            return self.held_keys
+        return pygame.key.get_pressed()
+
     def check_exit_collision(self):
         """Check if player has reached an exit in the maze."""
         if self.state != GameState.ZONE_MAZE or not hasattr(self, 'exit_rects') or not self.exit_rects:
@@ -877,6 +1256,8 @@ class Game:
                 else:
                     # Wrong exit - push player back and show message
                     self.show_message("This isn't the right way. Try another exit!", 120)
+                    self.audio.play('wrong_exit')
+                    self.analytics.track('wrong_exit', exit=i)
                     # Push player away from the exit
                     if i == 0:  # Top exit
                         self.player.rect.y = exit_rect.bottom + 10
@@ -887,23 +1268,27 @@ class Game:
                     else:  # Left exit
                         self.player.rect.x = exit_rect.right + 10
                     # Ensure player is still in bounds
-                    self.player.rect.x = max(0, min(self.player.rect.x, SCREEN_WIDTH - self.player.width))
-                    self.player.rect.y = max(0, min(self.player.rect.y, SCREEN_HEIGHT - self.player.height))
+                    self.player.rect.clamp_ip(self.camera.world)
                     return False
         return False
 
-    def update(self):
-        # Update message timers
+    def advance_messages(self, frames: int = 1):
+        """Count the current message down by a number of frames"""
         if self.messages:
             text, duration = self.messages[0]
-            self.message_timer += 1
+            self.message_timer += frames
             if self.message_timer > duration:
                 self.messages.pop(0)
                 self.message_timer = 0
+
+    def update(self):
+        # Update message timers
+        self.advance_messages()
+        self.particles.update()
         
         # Auto-transition from intro to Zone 1 after a delay
         if self.state == GameState.INTRO:
-            if pygame.time.get_ticks() > 3000:  # 3 seconds
+            if pygame.time.get_ticks() - self.intro_started > INTRO_DURATION:
                 self.state = GameState.ZONE_SCARCITY
                 self.setup_zones()
                 self.position_player_in_safe_area()
@@ -912,7 +1297,7 @@ class Game:
         
         # Handle player movement if not in dialogue
         if not self.choice_active:
-            keys = pygame.key.get_pressed()
+            keys = self.pressed_keys()
             dx, dy = 0, 0
             if keys[pygame.K_LEFT] or keys[pygame.K_a]:
                 dx = -1
@@ -923,9 +1308,13 @@ class Game:
             if keys[pygame.K_DOWN] or keys[pygame.K_s]:
                 dy = 1
             
-            # Only move if we have some input
+            # Only move if we have some input; keys take over from a click
             if dx != 0 or dy != 0:
-                self.player.move(dx, dy, self.walls)
+                self.route = None
+                self.waypoints = []
+                self.player.move(dx, dy, self.nearby_walls(), self.camera.world)
+            else:
+                self.follow_route()
             
             # Check for space bar press to interact with NPCs in Zone 3
             if self.state == GameState.ZONE_RIVERBANK and keys[pygame.K_SPACE]:
@@ -934,11 +1323,18 @@ class Game:
                         abs(self.player.rect.centery - npc.rect.centery) < 50):
                         self.help_npc(npc)
                         break
+                else:
+                    nearest = self.crowd.nearest(self.player.rect) if self.crowd else None
+                    if nearest is not None:
+                        self.help_npc(self.crowd.sync(nearest))
+                        self.crowd.sync(nearest)  # Helped strangers stop wandering
         
         # Check for resource collection in all zones
         if self.state in [GameState.ZONE_SCARCITY, GameState.ZONE_RIVERBANK]:
             resource, all_collected = self.player.collect_resource(self.resources)
             if resource is not None:
+                self.particles.burst(resource.rect.center, GEM_GLOW)
+                self.audio.play('gem_pickup')
                 self.show_message(f"Collected a magic gem! ({self.player.resources}/3)", 60)
                 if all_collected and not self.choice_active and self.state == GameState.ZONE_SCARCITY:
                     self.choice_active = True
@@ -950,6 +1346,11 @@ class Game:
         
         # Zone 3: Riverbank - free movement with wall collisions only
         elif self.state == GameState.ZONE_RIVERBANK:
+            if self.crowd:
+                self.crowd.update()
+            if self.enlightenment_rect:
+                self.particles.ambient(self.enlightenment_rect, ENLIGHTENMENT_GLOW)
+            
             # Check if all NPCs have been helped and create enlightenment rectangle
             all_helped = all(npc.helped for npc in self.npcs if not npc.dead)
             
@@ -970,19 +1371,73 @@ class Game:
             both_npcs_alive = all(not npc.dead for npc in self.npcs)
             if self.enlightenment_rect and self.player.rect.colliderect(self.enlightenment_rect) and all_helped and both_npcs_alive:
                 print("Victory condition met! Transitioning to VICTORY state")
+                self.audio.play('enlightenment')
+                self.analytics.track('victory', choice=self.choice_made, revived=self.revived_npc,
+                                     seconds=round(time.perf_counter() - self.playthrough_started, 1))
                 self.state = GameState.VICTORY
                 self.victory_shown = True
-                # Force a redraw immediately
-                self.draw()
-                pygame.display.flip()
+                # run() draws the victory screen right after this update
                 return  # Skip the rest of the update
             elif self.enlightenment_rect and self.player.rect.colliderect(self.enlightenment_rect) and not both_npcs_alive:
                 self.show_message("You must revive both NPCs to achieve enlightenment!", 120)
                 return  # Skip the rest of the update
 
+    def bake_static_tile(self, surface: pygame.Surface, tile_rect: pygame.Rect):
+        """Draw the zone's static layers that fall inside tile_rect onto a tile"""
+        surface.fill(BLACK)
+        for rect, color, width in self.static_grid.query(tile_rect):
+            pygame.draw.rect(surface, color, rect.move(-tile_rect.x, -tile_rect.y), width)
+
+    def rebuild_world(self):
+        """Recompute world bounds and spatial indexes after the zone layout changed"""
+        world = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+        world.unionall_ip(self.walls + self.exit_rects or [world])
+        self.camera.set_world(world)
+        # New walls: a new grid (with an empty path cache), and drop anything clicked in the old zone
+        from pathfind import NavGrid
+        self.nav = NavGrid(self.walls, world, self.player.width)
+        self.route = None
+        self.waypoints = []
+        self.nudge = None
+        self.lighting = None
+        if self.lighting_enabled and self.state == GameState.ZONE_SCARCITY:
+            from lighting import Lighting
+            self.lighting = Lighting(world, self.walls)
+        self.water = None
+        if self.water_enabled and self.state == GameState.ZONE_RIVERBANK and self.river:
+            from water import Water
+            self.water = Water(self.river, self.rocks + ([self.goal] if self.goal else []))
+        
+        self.wall_grid = SpatialGrid()
+        for wall in self.walls:
+            self.wall_grid.insert(wall)
+        
+        # Static drawables in draw order: (rect, color, outline width)
+        self.static_grid = SpatialGrid()
+        if self.state == GameState.ZONE_RIVERBANK:
+            for segment in self.river or []:
+                self.static_grid.insert(segment, (segment, (0, 100, 200), 0))  # River (blue)
+            for rock in self.rocks:
+                self.static_grid.insert(rock, (rock, (100, 100, 100), 0))
+            if self.goal:
+                self.static_grid.insert(self.goal, (self.goal, (0, 255, 0), 0))
+        else:
+            # Walls are only drawn outside the riverbank
+            for wall in self.walls:
+                self.static_grid.insert(wall, (wall, WHITE, 0))
+        if self.state == GameState.ZONE_MAZE:
+            for exit_rect in self.exit_rects:
+                # Draw a thin white line for all exits (all exits look the same)
+                self.static_grid.insert(exit_rect, (exit_rect, WHITE, 1))
+        self.static_tiles.clear()
+
+    def nearby_walls(self) -> List[pygame.Rect]:
+        """Walls close enough to the player to matter for this frame's move"""
+        return self.wall_grid.query(self.player.rect.inflate(64, 64))
+
     def draw(self):
         # Clear screen
-        self.screen.fill(BLACK)
+        self.renderer.clear(BLACK)
         
         # Debug output
         #print(f"Draw called. State: {self.state}, Victory shown: {self.victory_shown}")
@@ -990,7 +1445,7 @@ class Game:
         # Check for victory state first - only show the victory screen
         if self.state == GameState.VICTORY or self.victory_shown:
             # Fill with black background
-            self.screen.fill(BLACK)
+            self.renderer.clear(BLACK)
             
             # Create a white border rectangle
             border_size = 20
@@ -1000,14 +1455,10 @@ class Game:
                 SCREEN_WIDTH - 2 * border_size,
                 SCREEN_HEIGHT - 2 * border_size
             )
-            pygame.draw.rect(self.screen, WHITE, border_rect, 2)  # 2 pixel thick border
-            
-            # Create fonts for the victory text
-            title_font = pygame.font.Font(None, 60)  # Smaller title font
-            message_font = pygame.font.Font(None, 32)  # Smaller message font
+            self.renderer.draw_rect(WHITE, border_rect, 2)  # 2 pixel thick border
             
             # Title
-            title_text = title_font.render("ENLIGHTENMENT ACHIEVED", True, WHITE)
+            title_text = self.renderer.text_surface(self.get_font(60), "ENLIGHTENMENT ACHIEVED", WHITE)
             title_rect = title_text.get_rect(center=(SCREEN_WIDTH//2, 100))
             
             # Main messages
@@ -1015,103 +1466,107 @@ class Game:
             message2 = "Goodness is the best investment for a better world."
             
             # Render and position first message
-            message1_surface = message_font.render(message1, True, WHITE)
+            message1_surface = self.renderer.text_surface(self.get_font(32), message1, WHITE)
             message1_rect = message1_surface.get_rect(center=(SCREEN_WIDTH//2, 200))
             
             # Render and position second message below the first
-            message2_surface = message_font.render(message2, True, WHITE)
+            message2_surface = self.renderer.text_surface(self.get_font(32), message2, WHITE)
             message2_rect = message2_surface.get_rect(center=(SCREEN_WIDTH//2, 240))
             
             # Draw the title and messages
-            self.screen.blit(title_text, title_rect)
-            self.screen.blit(message1_surface, message1_rect)
-            self.screen.blit(message2_surface, message2_rect)
+            self.renderer.blit(title_text, title_rect)
+            self.renderer.blit(message1_surface, message1_rect)
+            self.renderer.blit(message2_surface, message2_rect)
                 
             # Add a prompt to exit
-            prompt_font = pygame.font.Font(None, 30)
-            prompt_text = prompt_font.render("Press ESC to exit or R to restart", True, WHITE)
+            prompt_text = self.renderer.text_surface(self.get_font(30), "Press ESC to exit or R to restart", WHITE)
             prompt_rect = prompt_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT - 50))
-            self.screen.blit(prompt_text, prompt_rect)
+            self.renderer.blit(prompt_text, prompt_rect)
             
             self.victory_shown = True
             return  # Skip drawing everything else
+        
+        # Intro screen, shown while nothing else has been built yet
+        if self.state == GameState.INTRO:
+            title_text = self.renderer.text_surface(self.get_font(60), "Echoes of Humanity", WHITE)
+            self.renderer.blit(title_text, title_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 40)))
+            prompt_text = self.renderer.text_surface(self.font, "Press SPACE to begin", GRAY)
+            self.renderer.blit(prompt_text, prompt_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 20)))
+            return
             
-        # Draw zone-specific elements
-        if self.state == GameState.ZONE_RIVERBANK:
-            # Draw the background (black for land)
-            self.screen.fill(BLACK)
-            
-            # Draw river (blue)
-            if self.river:
-                for segment in self.river:
-                    pygame.draw.rect(self.screen, (0, 100, 200), segment)
-            
-            # Draw rocks in the river
-            for rock in self.rocks:
-                pygame.draw.rect(self.screen, (100, 100, 100), rock)
-            
-            # Draw goal (green)
-            if self.goal:
-                pygame.draw.rect(self.screen, (0, 255, 0), self.goal)
+        # Everything up to the HUD is drawn in world coordinates through the camera
+        self.camera.follow(self.player.rect)
+        viewport = self.camera.viewport
+        self.renderer.offset = self.camera.offset
+        
+        # Static layers (river, rocks, goal, walls, exits) come from baked tiles. They're
+        # the opaque background, so walls and exits sit under sprites and labels
+        for tile, pos in self.static_tiles.visible(viewport.clip(self.camera.world)):
+            self.renderer.blit(tile, pos)
+        if self.water:
+            self.water.draw(self.renderer, viewport, pygame.time.get_ticks())
         
         # Draw resources (gems)
         for resource in self.resources:
-            resource.draw(self.screen)
+            if viewport.colliderect(resource.rect):
+                resource.draw(self.renderer)
         
-        # Draw NPCs
+        # Draw NPCs (with room for their labels)
+        label_view = viewport.inflate(200, 60)
         for npc in self.npcs:
-            npc.draw(self.screen, self.font)
+            if label_view.colliderect(npc.rect):
+                npc.draw(self.renderer, self.font)
+        if self.crowd:
+            self.crowd.draw(self.renderer, viewport)
+            # Only the stranger the player could help gets a label
+            nearest = self.crowd.nearest(self.player.rect)
+            if nearest is not None:
+                self.crowd.sync(nearest).draw(self.renderer, self.font)
             
         # Draw the player (on top of everything else)
-        self.player.draw(self.screen)
+        self.player.draw(self.renderer)
         
         # Draw the enlightenment rectangle if it exists
         if self.enlightenment_rect and self.state == GameState.ZONE_RIVERBANK:
             # Draw a glowing yellow circle for enlightenment
-            glow_surface = pygame.Surface((self.enlightenment_rect.width * 2, self.enlightenment_rect.height * 2), pygame.SRCALPHA)
-            pygame.draw.circle(glow_surface, (255, 255, 0, 64), 
-                             (self.enlightenment_rect.width, self.enlightenment_rect.height), 
-                             self.enlightenment_rect.width)
-            self.screen.blit(glow_surface, 
-                           (self.enlightenment_rect.x - self.enlightenment_rect.width//2, 
-                            self.enlightenment_rect.y - self.enlightenment_rect.height//2))
+            self.renderer.circle((255, 255, 0, 64), 
+                                 (self.enlightenment_rect.x + self.enlightenment_rect.width//2, 
+                                  self.enlightenment_rect.y + self.enlightenment_rect.height//2), 
+                                 self.enlightenment_rect.width)
             
             # Draw the main circle
-            pygame.draw.circle(self.screen, (255, 255, 0), 
-                             (self.enlightenment_rect.x + self.enlightenment_rect.width//2, 
-                              self.enlightenment_rect.y + self.enlightenment_rect.height//2), 
-                             self.enlightenment_rect.width//2)
+            self.renderer.circle((255, 255, 0), 
+                                 (self.enlightenment_rect.x + self.enlightenment_rect.width//2, 
+                                  self.enlightenment_rect.y + self.enlightenment_rect.height//2), 
+                                 self.enlightenment_rect.width//2)
             
             # Add a pulsing effect
             pulse_size = int(10 * abs(math.sin(pygame.time.get_ticks() * 0.005)))
-            pygame.draw.circle(self.screen, (255, 255, 100), 
-                             (self.enlightenment_rect.x + self.enlightenment_rect.width//2, 
-                              self.enlightenment_rect.y + self.enlightenment_rect.height//2), 
-                             self.enlightenment_rect.width//4 + pulse_size)
-        
-        # Draw walls for other zones
-        if self.state != GameState.ZONE_RIVERBANK:
-            for wall in self.walls:
-                pygame.draw.rect(self.screen, WHITE, wall)
-                
-        # Draw exit indicators in Zone 2 (all exits look the same)
-        if self.state == GameState.ZONE_MAZE and self.exit_rects:
-            for exit_rect in self.exit_rects:
-                # Draw a thin white line for all exits
-                pygame.draw.rect(self.screen, WHITE, exit_rect, 1)
+            self.renderer.circle((255, 255, 100), 
+                                 (self.enlightenment_rect.x + self.enlightenment_rect.width//2, 
+                                  self.enlightenment_rect.y + self.enlightenment_rect.height//2), 
+                                 self.enlightenment_rect.width//4 + pulse_size)
+        
+        # Where a click is taking the player
+        if self.waypoints:
+            self.renderer.circle((255, 255, 255, 90), self.waypoints[0], 6)
+        
+        self.particles.draw(self.renderer, viewport)
+        if self.lighting:
+            self.lighting.update(self.player.rect.center)
+            self.lighting.draw(self.renderer)
+        self.renderer.offset = (0, 0)
 
         # Draw messages
         if self.messages:
             text, _ = self.messages[0]
-            text_surface = self.font.render(text, True, WHITE)
-            self.screen.blit(text_surface, (10, 10))
+            text_surface = self.renderer.text_surface(self.font, text, WHITE)
+            self.renderer.blit(text_surface, (10, 10))
 
         # Draw choice interface last (on top of everything else)
         if self.choice_active:
             # Semi-transparent overlay (covers everything)
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 180))  # Semi-transparent black
-            self.screen.blit(overlay, (0, 0))
+            self.renderer.fill_rect((0, 0, 0, 180), (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))  # Semi-transparent black
 
             # Draw choice box
             box_width = 600
@@ -1120,17 +1575,16 @@ class Game:
             box_y = (SCREEN_HEIGHT - box_height) // 2
 
             # Main box
-            pygame.draw.rect(self.screen, (30, 30, 30), (box_x, box_y, box_width, box_height))
-            pygame.draw.rect(self.screen, WHITE, (box_x, box_y, box_width, box_height), 2)
+            self.renderer.fill_rect((30, 30, 30), (box_x, box_y, box_width, box_height))
+            self.renderer.draw_rect(WHITE, (box_x, box_y, box_width, box_height), 2)
 
             # Draw title with a subtle highlight
-            title_bg = pygame.Surface((box_width - 20, 40), pygame.SRCALPHA)
-            title_bg.fill((255, 255, 255, 30))  # Slight white background for title
-            self.screen.blit(title_bg, (box_x + 10, box_y + 10))
+            # Slight white background for title
+            self.renderer.fill_rect((255, 255, 255, 30), (box_x + 10, box_y + 10, box_width - 20, 40))
 
-            title = self.font.render("A Difficult Choice", True, (255, 255, 150))  # Light yellow
+            title = self.renderer.text_surface(self.font, "A Difficult Choice", (255, 255, 150))  # Light yellow
             title_x = box_x + (box_width - title.get_width()) // 2
-            self.screen.blit(title, (title_x, box_y + 20))
+            self.renderer.blit(title, (title_x, box_y + 20))
 
             # Draw choices
             choices = [
@@ -1141,25 +1595,21 @@ class Game:
             ]
 
             # Choice background
-            choices_bg = pygame.Surface((box_width - 40, 200), pygame.SRCALPHA)
-            choices_bg.fill((255, 255, 255, 20))  # Very subtle background for choices
-            self.screen.blit(choices_bg, (box_x + 20, box_y + 70))
+            # Very subtle background for choices
+            self.renderer.fill_rect((255, 255, 255, 20), (box_x + 20, box_y + 70, box_width - 40, 200))
 
             for i, choice in enumerate(choices):
                 y_offset = box_y + 70 + i * 40
                 # Highlight the number key more prominently
-                key_surface = self.font.render(str(i+1), True, (255, 255, 0))  # Yellow for keys
-                self.screen.blit(key_surface, (box_x + 30, y_offset))
+                key_surface = self.renderer.text_surface(self.font, str(i+1), (255, 255, 0))  # Yellow for keys
+                self.renderer.blit(key_surface, (box_x + 30, y_offset))
                 # Draw choice text
-                text = self.font.render(choice[3:], True, WHITE)  # Skip the number (already drawn)
-                self.screen.blit(text, (box_x + 50, y_offset))
+                text = self.renderer.text_surface(self.font, choice[3:], WHITE)  # Skip the number (already drawn)
+                self.renderer.blit(text, (box_x + 50, y_offset))
 
             # Draw instruction at bottom
-            instruction = self.font.render("Press 1-4 to make your choice...", True, (200, 200, 200))
-            self.screen.blit(instruction, (box_x + (box_width - instruction.get_width()) // 2, box_y + box_height - 40))
-
-        # Update the display
-        pygame.display.flip()
+            instruction = self.renderer.text_surface(self.font, "Press 1-4 to make your choice...", (200, 200, 200))
+            self.renderer.blit(instruction, (box_x + (box_width - instruction.get_width()) // 2, box_y + box_height - 40))
 
     def show_message(self, text: str, duration: int = 60):
         """
@@ -1168,29 +1618,272 @@ class Game:
         """
         self.messages.append((text, duration))
 
+    def is_static_screen(self) -> bool:
+        """True when nothing on screen moves until the player presses a key"""
+        if self.particles.active:
+            return False  # Let effects (like the last gem's burst) play out
+        return (self.state in (GameState.INTRO, GameState.VICTORY)
+                or self.victory_shown or self.choice_active)
+
+    def view_key(self):
+        """Everything a static screen's picture depends on"""
+        message = self.messages[0][0] if self.messages else None
+        return (self.state, self.choice_active, self.victory_shown, message, self.player.resources)
+
+    def restrict_events(self, restricted: bool):
+        """Keep only IDLE_EVENTS on the queue while idle, so mouse motion and
+        window chatter don't wake us"""
+        if restricted == self.events_restricted:
+            return
+        if restricted:
+            pygame.event.set_blocked(None)
+            pygame.event.set_allowed(IDLE_EVENTS)
+        else:
+            pygame.event.set_allowed(None)
+        self.events_restricted = restricted
+
+    def idle_wait(self) -> bool:
+        """Sleep until input arrives or a timer on screen runs out.
+        
+        Returns True if an event woke us. Message timers are counted in frames,
+        so they're caught up for the time spent asleep.
+        """
+        start = pygame.time.get_ticks()
+        event = pygame.event.wait(max(1, self.idle_timeout()))
+        if event.type != pygame.NOEVENT:
+            pygame.event.post(event)  # Let handle_events see it as usual
+        self.catch_up_messages(start)
+        return event.type != pygame.NOEVENT
+
+    async def idle_wait_async(self) -> bool:
+        """idle_wait() that polls the queue so other tasks run while we're idle"""
+        import asyncio
+        timeout = self.idle_timeout()
+        start = pygame.time.get_ticks()
+        woke = pygame.event.peek()
+        while not woke and pygame.time.get_ticks() - start < timeout:
+            await asyncio.sleep(IDLE_POLL)
+            woke = pygame.event.peek()
+        self.catch_up_messages(start)
+        return woke
+
+    def idle_timeout(self) -> int:
+        """Milliseconds until something on a static screen changes by itself"""
+        timeout = IDLE_MAX_WAIT
+        if self.state == GameState.INTRO:
+            timeout = min(timeout, INTRO_DURATION - (pygame.time.get_ticks() - self.intro_started))
+        if self.messages and self.state != GameState.VICTORY:
+            frames_left = self.messages[0][1] - self.message_timer + 1
+            timeout = min(timeout, frames_left * 1000 // 60)
+        return timeout
+
+    def catch_up_messages(self, start: int):
+        """Advance message timers for the frames spent asleep since start"""
+        # update() advances one more frame itself
+        slept_frames = (pygame.time.get_ticks() - start) * 60 // 1000
+        if slept_frames > 1 and self.state != GameState.VICTORY:
+            self.advance_messages(slept_frames - 1)
+
+    def track_state(self, leaving: bool = False):
+        """Report how long the previous GameState lasted once the state changes"""
+        now = time.perf_counter()
+        if self.tracked_state is not None and (leaving or self.state != self.tracked_state):
+            self.analytics.track('state_time', state=self.tracked_state.name,
+                                 seconds=round(now - self.state_entered, 2))
+        if self.tracked_state != self.state:
+            self.tracked_state = self.state
+            self.state_entered = now
+
+    def frame(self, idle: bool, woke: bool) -> Tuple[bool, bool]:
+        """Input, update and (if needed) draw one frame; returns (running, presented)"""
+        running = self.handle_events()
+        
+        # Only update game logic if not in victory state
+        if self.state != GameState.VICTORY:
+            self.update()
+        if self.broadcaster:
+            self.broadcaster.publish(self.spectator_state())
+        
+        # Static screens are only redrawn when input arrived or something changed
+        view = self.view_key()
+        presented = not idle or woke or view != self.last_view
+        if presented:
+            self.draw()
+            if self.recorder:
+                self.recorder.capture(self.renderer.read_frame())
+            
+            # Update the display
+            self.renderer.present()
+            self.latency.presented()
+            startup.report.first_frame()
+        self.last_view = view
+        self.track_state()
+        self.analytics.end_frame()
+        return running, presented
+
+    def spectator_state(self) -> dict:
+        """What spectators see this tick; zone geometry is passed by reference
+        and only converted by the broadcaster when the zone changes"""
+        enlightenment = self.enlightenment_rect
+        return {
+            'state': self.state.value,
+            'player': tuple(self.player.rect),
+            'gems_held': self.player.resources,
+            'npcs': [(npc.npc_type, npc.rect.x, npc.rect.y, npc.dead, npc.helped, npc.needs_help,
+                      npc.gems_given, npc.gems_required) for npc in self.npcs],
+            'gems': [tuple(gem.rect.topleft) for gem in self.resources if not gem.collected],
+            'message': self.messages[0][0] if self.messages else '',
+            'enlightenment': tuple(enlightenment) if enlightenment else None,
+            'walls': self.walls,
+            'river': self.river,
+            'rocks': self.rocks,
+            'exits': self.exit_rects,
+        }
+
+    def shutdown(self):
+        """Report and flush what we measured once the loop ends"""
+        self.track_state(leaving=True)
+        if self.latency.samples:
+            self.analytics.track('input_latency', pacing=self.pacer.mode, **self.latency.percentiles(),
+                                 worst_p95_ms=self.latency.percentiles(worst=True)['p95_ms'])
+        if self.latency_report:
+            print(self.latency.format())
+        self.write_pending_save()
+        self.analytics.close()
+        if self.broadcaster:
+            self.broadcaster.close()
+        if self.recorder:
+            self.recorder.close()
+
     def run(self):
         """Main game loop"""
         running = True
+        self.last_view = None
         while running:
-            running = self.handle_events()
-            
-            # Only update game logic if not in victory state
-            if self.state != GameState.VICTORY:
-                self.update()
-            
-            # Always draw, but draw different things based on state
-            self.draw()
-            
-            # Update the display
-            pygame.display.flip()
-            self.clock.tick(60)  # Cap at 60 FPS
+            idle = self.idle_mode and self.is_static_screen()
+            self.restrict_events(idle)
+            woke = self.idle_wait() if idle else False
+            self.pacer.before_input(wait=not idle)
+            running, presented = self.frame(idle, woke)
+            self.pacer.after_present(presented)  # Caps at 60 FPS
+        self.shutdown()
+
+    async def run_async(self, *background):
+        """Main loop for asyncio hosts and pygbag browser builds.
+        
+        Yields to the event loop at least once per frame and paces with
+        asyncio sleeps instead of clock.tick(), so background coroutines (ours
+        below plus any passed in) run between frames without threads.
+        """
+        import asyncio  # Only asyncio hosts pay for importing it
+        self.analytics.threaded = False
+        self.defer_saves = True
+        tasks = [asyncio.create_task(coro) for coro in
+                 (self.preload_assets(), self.write_in_background(), *background)]
+        running = True
+        self.last_view = None
+        try:
+            while running:
+                idle = self.idle_mode and self.is_static_screen()
+                self.restrict_events(idle)
+                woke = await self.idle_wait_async() if idle else False
+                await self.pacer.before_input_async(wait=not idle)
+                running, presented = self.frame(idle, woke)
+                await self.pacer.after_present_async(presented)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.shutdown()
+
+    async def preload_assets(self):
+        """Warm the caches the later zones need while the intro is showing"""
+        import asyncio
+        for npc_type in ('elder', 'child', 'stranger'):
+            for dead, helped, gems in ((False, False, 0), (False, True, 4), (True, False, 0)):
+                npc = NPC(0, 0, needs_help=not dead, npc_type=npc_type)
+                npc.dead, npc.helped, npc.gems_given = dead, helped, gems
+                npc.update_sprite()
+                await asyncio.sleep(0)
+        for size in (60, 32, 30):  # Victory screen
+            self.get_font(size)
+            await asyncio.sleep(0)
+        if self.maze_size:
+            self.generated_maze()  # Cached, so Zone 2 starts instantly
+
+    async def write_in_background(self, interval: float = 0.5):
+        """Write analytics batches and quicksaves between frames"""
+        import asyncio
+        while True:
+            await asyncio.sleep(interval)
+            self.analytics.drain()
+            self.write_pending_save()
 
 if __name__ == "__main__":
+    import argparse
+    from options import RECORD_FORMATS, SPECTATE_ADDRESS
+    parser = argparse.ArgumentParser(description="Echoes of Humanity")
+    parser.add_argument('--renderer', choices=RENDERERS,
+                        default=os.environ.get('ECHOES_RENDERER', 'software'),
+                        help="Drawing backend: software blits or SDL textures "
+                             "('texture-soft' forces SDL's software renderer)")
+    parser.add_argument('--no-idle', action='store_true',
+                        help="Keep running at 60 FPS on static screens instead of sleeping")
+    def maze_size(value):
+        size = int(value)
+        if size < MAZE_SIZE_MIN:
+            raise argparse.ArgumentTypeError(f"must be at least {MAZE_SIZE_MIN}")
+        return size
+    
+    parser.add_argument('--maze-size', type=maze_size, default=None, metavar='N',
+                        help=f"Generate an N x N Zone 2 maze (N >= {MAZE_SIZE_MIN}) instead of the hand-made one")
+    parser.add_argument('--maze-seed', type=int, default=0)
+    parser.add_argument('--crowd', type=int, default=0,
+                        help="Add this many wandering strangers to the riverbank")
+    parser.add_argument('--mute', action='store_true', help="Don't open the audio device")
+    parser.add_argument('--analytics', metavar='DIR', default='analytics',
+                        help="Directory for gameplay analytics (rotating JSONL files)")
+    parser.add_argument('--no-analytics', action='store_true', help="Don't record gameplay analytics")
+    parser.add_argument('--pacing', choices=PACING_MODES, default='default',
+                        help="'late' sleeps before reading input instead of after presenting")
+    parser.add_argument('--latency-report', action='store_true',
+                        help="Print input-to-present latency percentiles on exit")
+    parser.add_argument('--asyncio', action='store_true',
+                        help="Run the asyncio main loop (Game.run_async) instead of the blocking one")
+    parser.add_argument('--spectate', metavar='ADDRESS', nargs='?', const=SPECTATE_ADDRESS,
+                        help=f"Stream the session to spectators (host:port or unix:/path, default {SPECTATE_ADDRESS})")
+    parser.add_argument('--record', metavar='DIR', help="Record every presented frame into DIR")
+    parser.add_argument('--record-format', choices=RECORD_FORMATS, default='png',
+                        help="Numbered PNGs, or one raw RGB stream (frames.rgb + frames.json)")
+    parser.add_argument('--assets', metavar='PATH', default=ASSET_PACK,
+                        help="Pre-rendered asset pack to map at startup (build it with python assets.py)")
+    parser.add_argument('--no-assets', action='store_true', help="Draw every sprite and text at runtime")
+    parser.add_argument('--no-lighting', action='store_true',
+                        help="Turn off the Zone 1 fog of war (light around the player, blocked by walls)")
+    parser.add_argument('--no-water', action='store_true',
+                        help="Draw the Zone 3 river flat instead of animated")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="Print import times and time-to-first-frame after the first frame")
+    args = parser.parse_args()
+    startup.report.enabled = args.startup_report
+    startup.report.mark('imports')
     try:
         print("Initializing game...")
-        game = Game()
+        game = Game(renderer=args.renderer, idle_mode=not args.no_idle,
+                    maze_size=args.maze_size, maze_seed=args.maze_seed, crowd_size=args.crowd,
+                    audio=not args.mute,
+                    analytics_dir=None if args.no_analytics else args.analytics, pacing=args.pacing,
+                    spectate=args.spectate, record=args.record, record_format=args.record_format,
+                    asset_pack=None if args.no_assets else args.assets,
+                    lighting=not args.no_lighting, water=not args.no_water)
+        game.latency_report = args.latency_report
+        startup.report.mark('game created')
         print("Game initialized. Starting main loop...")
-        game.run()
+        if args.asyncio:
+            import asyncio
+            asyncio.run(game.run_async())
+        else:
+            game.run()
     except Exception as e:
         import traceback
         print(f"An error occurred: {e}")
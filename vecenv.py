@@ -0,0 +1,483 @@
+"""Many game sessions stepped in lockstep as NumPy arrays, for bots and tuning.
+
+    python vecenv.py --bench --count 65536
+    python vecenv.py --check      # compare against real Game objects step by step
+
+VecEnv holds K independent sessions as arrays (position, gems, zone, the
+Zone 1 choice, NPC states, collected gems) and applies one action to each
+per step with array operations. There are no per-session Game objects,
+sprites or displays. The zone layouts (walls, gems, exits, NPCs, spawn points
+and world bounds) are captured once from a headless Game, so every session
+plays the same layout. Only the rules are rewritten here, following the code
+they mirror:
+
+- movement: handle_events moves at 3x, then update() at 1x, both through
+  Player.move. That means get_speed(), diagonal scaling, first-wall snapping
+  per axis, clamping to the world, and pygame's rounding of float moves.
+- gems: Player.collect_resource, and the Zone 1 choice appears after 3 gems.
+- choices: the 1-4 keys in handle_events.
+- helping: holding SPACE near an NPC calls help_npc (revival costs 3 or 5,
+  otherwise one gem per step).
+- zones: check_exit_collision in the maze, and the enlightenment and victory
+  checks in update().
+
+Crowds, messages, particles and the intro aren't modelled; sessions start in
+Zone 1. --check replays random action streams on real Games (holding keys
+through Game.held_keys) and compares every session after every step.
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+from typing import List, Optional
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from the_game import Game, GameState, HeldKeys, NPC, Player, SCREEN_WIDTH, SCREEN_HEIGHT
+
+# Zones, in the order a run goes through them
+SCARCITY, MAZE, RIVERBANK, VICTORY = range(4)
+ZONE_STATES = (GameState.ZONE_SCARCITY, GameState.ZONE_MAZE, GameState.ZONE_RIVERBANK)
+
+# Actions: hold a direction, hold SPACE, or press a choice key
+ACTIONS = ('noop', 'up', 'down', 'left', 'right', 'up-left', 'up-right', 'down-left', 'down-right',
+           'space', 'choice 1', 'choice 2', 'choice 3', 'choice 4')
+NOOP, UP, DOWN, LEFT, RIGHT, UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT, SPACE = range(10)
+CHOICE_1 = 10
+DIRECTIONS = np.array([(0, 0), (0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (1, -1), (-1, 1), (1, 1),
+                       (0, 0), (0, 0), (0, 0), (0, 0), (0, 0)], dtype=np.int64)
+ACTION_KEYS = ((), (pygame.K_w,), (pygame.K_s,), (pygame.K_a,), (pygame.K_d,), (pygame.K_w, pygame.K_a),
+               (pygame.K_w, pygame.K_d), (pygame.K_s, pygame.K_a), (pygame.K_s, pygame.K_d), (pygame.K_SPACE,),
+               (pygame.K_1,), (pygame.K_2,), (pygame.K_3,), (pygame.K_4,))
+CHOICES = ('elder', 'child', 'both', 'neither')
+NEITHER = 3
+
+EVENT_MOVE = 3  # handle_events moves 3x the player's speed, then update() moves 1x
+HELP_DISTANCE = 50  # SPACE reaches NPCs whose centers are closer than this on both axes
+# Where the enlightenment appears: help_npc's rect, and update()'s when none exists yet
+HELP_ENLIGHTENMENT = (SCREEN_WIDTH // 2 - 25, SCREEN_HEIGHT - 100, 50, 50)
+UPDATE_ENLIGHTENMENT = (SCREEN_WIDTH - 150, SCREEN_HEIGHT - 150, 100, 100)
+
+
+def rect_array(rects) -> np.ndarray:
+    return np.array([tuple(r) for r in rects], dtype=np.int32).reshape(-1, 4)
+
+
+def overlaps(x, y, w, h, rects: np.ndarray) -> np.ndarray:
+    """(n, len(rects)) pygame colliderect between n rects and a rect array"""
+    rx, ry, rw, rh = (rects[:, i] for i in range(4))
+    return ((x[:, None] < rx + rw) & ((x + w)[:, None] > rx) &
+            (y[:, None] < ry + rh) & ((y + h)[:, None] > ry))
+
+
+def pygame_round(values: np.ndarray) -> np.ndarray:
+    """How pygame stores a float assigned to a Rect coordinate (half away from zero)"""
+    return np.trunc(values + np.copysign(0.5, values)).astype(np.int32)
+
+
+class Layout:
+    """One zone's geometry as arrays"""
+
+    def __init__(self, game: Game):
+        self.walls = rect_array(game.walls)
+        # Wall edges, for the per-axis collision tests in VecEnv._slide
+        self.left, self.top = self.walls[:, 0], self.walls[:, 1]
+        self.right, self.bottom = self.left + self.walls[:, 2], self.top + self.walls[:, 3]
+        self.bounds = tuple(game.camera.world)
+        self.spawn = game.player.rect.topleft
+        self.gems = rect_array(gem.rect for gem in game.resources)
+        self.exits = rect_array(game.exit_rects)
+        self.correct_exit = game.correct_exit
+        self.npcs = rect_array(npc.rect for npc in game.npcs)
+
+
+def capture_layouts(game: Game, seed: int = 0) -> List[Layout]:
+    """Build each zone the way a run does (same random calls in the same order)"""
+    random.seed(seed)
+    game.reset()
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE, mod=0, unicode='', scancode=0))
+    game.handle_events()
+    layouts = [Layout(game)]
+    game.state = GameState.ZONE_MAZE  # As the choice handler does
+    game.setup_zones()
+    layouts.append(Layout(game))
+    game.state = GameState.ZONE_RIVERBANK  # As check_exit_collision does
+    game.setup_zones()
+    game.position_player_in_safe_area()
+    layouts.append(Layout(game))
+    return layouts
+
+
+class VecEnv:
+    """count sessions stepped together; all state is public arrays"""
+
+    def __init__(self, count: int, layouts: List[Layout]):
+        self.count = count
+        self.layouts = layouts
+        player = Player(0, 0)
+        self.base_speed = player.base_speed
+        self.speed_per_gem = player.speed_increase_per_gem
+        self.size = player.width
+        self.gems_required = NPC(0, 0).gems_required
+        self.max_gems = max(len(layout.gems) for layout in layouts)
+        self.zone = np.zeros(count, dtype=np.int32)
+        self.x = np.zeros(count, dtype=np.int32)
+        self.y = np.zeros(count, dtype=np.int32)
+        self.gems = np.zeros(count, dtype=np.int32)
+        self.collected = np.zeros((count, self.max_gems), dtype=bool)
+        self.choice = np.full(count, -1, dtype=np.int32)
+        self.choice_active = np.zeros(count, dtype=bool)
+        self.dead = np.zeros((count, 2), dtype=bool)
+        self.helped = np.zeros((count, 2), dtype=bool)
+        self.given = np.zeros((count, 2), dtype=np.int32)
+        self.required = np.zeros((count, 2), dtype=np.int32)
+        self.enlightenment = np.zeros(count, dtype=np.int32)  # 0 none, 1 help_npc's rect, 2 update()'s
+        self.steps = 0
+        self.reset()
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> None:
+        """Start sessions (all, or where mask is True) over at the Zone 1 spawn"""
+        idx = np.arange(self.count) if mask is None else np.flatnonzero(mask)
+        self.gems[idx] = 0
+        self.choice[idx] = -1
+        self.choice_active[idx] = False
+        self.dead[idx] = False
+        self.helped[idx] = False
+        self.given[idx] = 0
+        self.required[idx] = self.gems_required
+        self._enter(idx, SCARCITY)
+
+    def _enter(self, idx: np.ndarray, zone: int) -> None:
+        """setup_zones for a set of sessions"""
+        self.zone[idx] = zone
+        self.x[idx], self.y[idx] = self.layouts[zone].spawn
+        self.collected[idx] = False
+        self.enlightenment[idx] = 0
+        self.choice_active[idx] = False
+
+    def step(self, actions: np.ndarray) -> np.ndarray:
+        """Apply one action per session; returns which sessions reached VICTORY"""
+        actions = np.asarray(actions, dtype=np.int64)
+        self.steps += 1
+        live = self.zone != VICTORY
+
+        # handle_events: choice keys, then held keys move at 3x
+        choosing = np.flatnonzero(live & self.choice_active & (actions >= CHOICE_1))
+        if len(choosing):
+            self._choose(choosing, actions[choosing] - CHOICE_1)
+        dx, dy = DIRECTIONS[actions, 0], DIRECTIONS[actions, 1]
+        moving = live & ~self.choice_active & ((dx != 0) | (dy != 0))
+        self._move(moving, dx * EVENT_MOVE, dy * EVENT_MOVE)
+
+        # update(): 1x move, SPACE, gems, then the zone's own checks
+        self._move(moving, dx, dy)
+        helping = np.flatnonzero(live & ~self.choice_active & (actions == SPACE) & (self.zone == RIVERBANK))
+        if len(helping):
+            self._help(helping)
+        self._collect(live)
+        riverbank = np.flatnonzero(live & (self.zone == RIVERBANK))
+        maze = np.flatnonzero(live & (self.zone == MAZE))
+        if len(maze):
+            self._exits(maze)
+        if len(riverbank):
+            self._riverbank(riverbank)
+        return self.zone == VICTORY
+
+    def _move(self, mask: np.ndarray, dx: np.ndarray, dy: np.ndarray) -> None:
+        """Player.move for every session in mask, one zone layout at a time"""
+        for zone, layout in enumerate(self.layouts):
+            idx = np.flatnonzero(mask & (self.zone == zone))
+            if not len(idx):
+                continue
+            speed = self.base_speed + self.speed_per_gem * self.gems[idx]
+            fx, fy = dx[idx] * speed, dy[idx] * speed
+            diagonal = (fx != 0) & (fy != 0)
+            fx = np.where(diagonal, fx * 0.7071, fx)
+            fy = np.where(diagonal, fy * 0.7071, fy)
+            x = self._slide(self.x[idx], self.y[idx], fx, layout.left, layout.right, layout.top, layout.bottom)
+            y = self._slide(self.y[idx], x, fy, layout.top, layout.bottom, layout.left, layout.right)
+            size = self.size
+
+            bx, by, bw, bh = layout.bounds
+            self.x[idx] = np.clip(x, bx, bx + bw - size)
+            self.y[idx] = np.clip(y, by, by + bh - size)
+
+    def _slide(self, pos, other, delta, low, high, other_low, other_high) -> np.ndarray:
+        """Move pos by delta and stop against the first wall hit, on one axis"""
+        moved = np.flatnonzero(delta != 0)
+        if not len(moved):
+            return pos
+        pos = pos.copy()
+        new = pygame_round(pos[moved] + delta[moved])
+        if len(low):
+            o = other[moved]
+            hits = ((new[:, None] < high) & ((new + self.size)[:, None] > low) &
+                    (o[:, None] < other_high) & ((o + self.size)[:, None] > other_low))
+            hit = np.flatnonzero(hits.any(axis=1))
+            first = hits[hit].argmax(axis=1)
+            new[hit] = np.where(delta[moved[hit]] > 0, low[first] - self.size, high[first])
+        pos[moved] = new
+        return pos
+
+    def _collect(self, live: np.ndarray) -> None:
+        """Player.collect_resource in the zones that have gems"""
+        for zone in (SCARCITY, RIVERBANK):
+            gems = self.layouts[zone].gems
+            idx = np.flatnonzero(live & (self.zone == zone))
+            if not len(idx) or not len(gems):
+                continue
+            count = len(gems)
+            hits = overlaps(self.x[idx], self.y[idx], self.size, self.size, gems) & ~self.collected[idx, :count]
+            got = hits.any(axis=1)
+            idx, first = idx[got], hits[got].argmax(axis=1)
+            self.collected[idx, first] = True
+            self.gems[idx] += 1
+            if zone == SCARCITY:
+                # The choice comes up once 3 gems are in
+                ready = self.collected[idx].sum(axis=1) >= 3
+                self.choice_active[idx[ready]] = True
+
+    def _choose(self, idx: np.ndarray, choice: np.ndarray) -> None:
+        """The 1-4 keys: who gets the gems, then on to the maze"""
+        for npc in (0, 1):
+            # 1/2 help one NPC for 2 gems and the other dies
+            helps = choice == npc
+            self.helped[idx[helps], npc] = True
+            self.dead[idx[helps], 1 - npc] = True
+        self.gems[idx[choice < 2]] -= 2
+        both = idx[choice == 2]
+        self.helped[both] = True
+        self.gems[both] = 0
+        neither = idx[choice == NEITHER]
+        self.dead[neither] = True
+        self.gems[neither] = 3
+        self.choice[idx] = choice
+        self._enter(idx, MAZE)
+
+    def _help(self, idx: np.ndarray) -> None:
+        """SPACE near an NPC: help_npc on the first one in reach"""
+        npcs = self.layouts[RIVERBANK].npcs
+        half = self.size // 2
+        cx, cy = self.x[idx] + half, self.y[idx] + half
+        ncx, ncy = npcs[:, 0] + npcs[:, 2] // 2, npcs[:, 1] + npcs[:, 3] // 2
+        near = (np.abs(cx[:, None] - ncx) < HELP_DISTANCE) & (np.abs(cy[:, None] - ncy) < HELP_DISTANCE)
+        found = near.any(axis=1)
+        idx, npc = idx[found], near[found].argmax(axis=1)
+        gems = self.gems[idx]
+
+        # Revive: 3 gems after choosing neither, 5 otherwise, and the NPC is fully restored
+        cost = np.where(self.choice[idx] == NEITHER, 3, 5)
+        revive = self.dead[idx, npc] & (gems >= cost)
+        r, rn = idx[revive], npc[revive]
+        self.dead[r, rn] = False
+        self.helped[r, rn] = True
+        self.given[r, rn] = 5
+        self.required[r, rn] = 5
+        self.gems[r] -= cost[revive]
+
+        # Give one gem to a living NPC that still needs some
+        give = ~self.dead[idx, npc] & ~self.helped[idx, npc] & (gems > 0) & ~revive
+        g, gn = idx[give], npc[give]
+        self.given[g, gn] += 1
+        self.gems[g] -= 1
+        self.helped[g, gn] |= self.given[g, gn] >= self.required[g, gn]
+        everyone = (self.helped[g] | self.dead[g]).all(axis=1)
+        self.enlightenment[g[everyone]] = 1
+
+    def _exits(self, idx: np.ndarray) -> None:
+        """check_exit_collision: the right exit leads on, wrong ones push back"""
+        layout = self.layouts[MAZE]
+        exits = layout.exits
+        if not len(exits):
+            return
+        hits = overlaps(self.x[idx], self.y[idx], self.size, self.size, exits)
+        found = hits.any(axis=1)
+        idx, which = idx[found], hits[found].argmax(axis=1)
+        correct = which == layout.correct_exit
+        self._enter(idx[correct], RIVERBANK)
+
+        idx, which = idx[~correct], which[~correct]
+        ex, ey, ew, eh = (exits[which, i] for i in range(4))
+        x, y = self.x[idx], self.y[idx]
+        y = np.where(which == 0, ey + eh + 10, np.where(which == 2, ey - self.size - 10, y))
+        x = np.where(which == 1, ex - self.size - 10, np.where(which >= 3, ex + ew + 10, x))
+        bx, by, bw, bh = layout.bounds
+        self.x[idx] = np.clip(x, bx, bx + bw - self.size)
+        self.y[idx] = np.clip(y, by, by + bh - self.size)
+
+    def _riverbank(self, idx: np.ndarray) -> None:
+        """The enlightenment appears once every living NPC is helped; entering it wins
+        if both are alive"""
+        all_helped = (self.helped[idx] | self.dead[idx]).all(axis=1)
+        appears = idx[all_helped & (self.enlightenment[idx] == 0)]
+        self.enlightenment[appears] = 2
+
+        kind = self.enlightenment[idx]
+        rects = np.array([(0, 0, 0, 0), HELP_ENLIGHTENMENT, UPDATE_ENLIGHTENMENT], dtype=np.int32)[kind]
+        x, y, size = self.x[idx], self.y[idx], self.size
+        inside = ((x < rects[:, 0] + rects[:, 2]) & (x + size > rects[:, 0]) &
+                  (y < rects[:, 1] + rects[:, 3]) & (y + size > rects[:, 1]))
+        alive = ~self.dead[idx].any(axis=1)
+        self.zone[idx[(kind > 0) & inside & all_helped & alive]] = VICTORY
+
+
+def random_actions(rng: np.random.Generator, count: int, steps: int, hold: int = 20) -> np.ndarray:
+    """(steps, count) actions that hold a direction for a while, with some SPACE and choices"""
+    actions = np.empty((steps, count), dtype=np.int64)
+    current = rng.integers(1, 9, count)
+    for step in range(steps):
+        change = rng.random(count) < 1 / hold
+        current = np.where(change, rng.integers(0, len(ACTIONS), count), current)
+        actions[step] = current
+    return actions
+
+
+def guided_target(env: VecEnv, i: int):
+    """The rect session i should head for next (gem, exit, NPC, enlightenment), if any"""
+    zone = env.zone[i]
+    if zone == VICTORY or env.choice_active[i]:
+        return None
+    layout = env.layouts[zone]
+    uncollected = [g for g in range(len(layout.gems)) if not env.collected[i, g]]
+    if zone == MAZE:
+        return layout.exits[layout.correct_exit]
+    if zone == RIVERBANK:
+        cost = 3 if env.choice[i] == NEITHER else 5
+        needy = [n for n in (0, 1) if env.dead[i, n] or not env.helped[i, n]]
+        if needy and env.gems[i] >= (cost if env.dead[i, needy[0]] else 1):
+            return layout.npcs[needy[0]]
+        if not uncollected and env.enlightenment[i]:
+            return HELP_ENLIGHTENMENT if env.enlightenment[i] == 1 else UPDATE_ENLIGHTENMENT
+    return layout.gems[uncollected[0]] if uncollected else None
+
+
+def guided_action(env: VecEnv, i: int, rng: np.random.Generator) -> Optional[int]:
+    """Step toward the target, make the choice, or press SPACE next to an NPC"""
+    if env.zone[i] == SCARCITY and env.choice_active[i]:
+        return CHOICE_1 + int(rng.integers(len(CHOICES)))
+    target = guided_target(env, i)
+    if target is None:
+        return None
+    half = env.size // 2
+    dx = np.sign(target[0] + target[2] // 2 - env.x[i] - half)
+    dy = np.sign(target[1] + target[3] // 2 - env.y[i] - half)
+    if env.zone[i] == RIVERBANK and any((target == npc).all() for npc in env.layouts[RIVERBANK].npcs):
+        if (abs(env.x[i] + half - target[0] - target[2] // 2) < HELP_DISTANCE and
+                abs(env.y[i] + half - target[1] - target[3] // 2) < HELP_DISTANCE):
+            return SPACE
+    return next(a for a in range(SPACE) if tuple(DIRECTIONS[a]) == (dx, dy))
+
+
+def check(instances: int, steps: int, seed: int, maze_size: Optional[int] = None, log=sys.stdout) -> bool:
+    """Play the same random actions on VecEnv and on real Games; True if they always agree"""
+    games = []
+    for _ in range(instances):
+        game = Game(audio=False, lighting=False, maze_size=maze_size)
+        layouts = capture_layouts(game, seed)
+        # Collision order is the zone's wall list, as in Player.move(walls=game.walls)
+        game.nearby_walls = lambda game=game: game.walls
+        games.append(game)
+    # Each game gets its own copy of the random state the layouts were built from
+    random.seed(seed)
+    random_states = [random.getstate()] * instances
+    env = VecEnv(instances, layouts)
+    rng = np.random.default_rng(seed)
+    actions = random_actions(rng, instances, steps)
+
+    reached = set()
+    for step in range(steps):
+        # Mostly purposeful, with the random stream mixed in to hit walls and odd inputs.
+        # Now and then both sides jump to near the next target, like soak.Bot's go_to.
+        for i, game in enumerate(games):
+            if not step:
+                continue
+            if rng.random() < 0.7:
+                guided = guided_action(env, i, rng)
+                if guided is not None:
+                    actions[step, i] = guided
+            target = guided_target(env, i)
+            if target is not None and rng.random() < 0.01:
+                x, y = target[:2] + rng.integers(-60, 61, 2)
+                env.x[i], env.y[i] = x, y
+                game.player.rect.topleft = (x, y)
+        for i, game in enumerate(games):
+            action = actions[step, i]
+            if action >= CHOICE_1 or (step == 0):
+                key = pygame.K_SPACE if step == 0 else ACTION_KEYS[action][0]  # SPACE leaves the intro
+                pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode='', scancode=0))
+            game.held_keys = HeldKeys(() if step == 0 else ACTION_KEYS[action])
+            random.setstate(random_states[i])
+            if step == 0:
+                game.reset()
+            game.handle_events()
+            if step and game.state != GameState.VICTORY:
+                game.update()
+            random_states[i] = random.getstate()
+        if step:
+            env.step(actions[step])
+
+        for i, game in enumerate(games):
+            zone = VICTORY if game.state == GameState.VICTORY else ZONE_STATES.index(game.state)
+            reached.add(zone)
+            expected = (zone, game.player.rect.x, game.player.rect.y, game.player.resources,
+                        [(n.dead, n.helped, n.gems_given, n.gems_required) for n in game.npcs])
+            actual = (int(env.zone[i]), int(env.x[i]), int(env.y[i]), int(env.gems[i]),
+                      [(bool(env.dead[i, n]), bool(env.helped[i, n]), int(env.given[i, n]), int(env.required[i, n]))
+                       for n in range(2)])
+            if zone == VICTORY:
+                # Finished; the game still lets the player walk around the victory screen
+                expected, actual = expected[0], actual[0]
+            if expected != actual:
+                print(f"step {step}, session {i}, action {ACTIONS[actions[step, i]]}:\n"
+                      f"  game   {expected}\n  vecenv {actual}", file=log)
+                return False
+    names = ('Zone 1', 'maze', 'riverbank', 'victory')
+    won = env.zone == VICTORY
+    print(f"check: {instances} sessions x {steps} steps agree (reached {', '.join(names[z] for z in sorted(reached))}; "
+          f"{won.sum()} won, after choosing {', '.join(sorted({CHOICES[c] for c in env.choice[won]}))})", file=log)
+    return True
+
+
+def bench(count: int, steps: int, seed: int, maze_size: Optional[int] = None) -> float:
+    game = Game(audio=False, lighting=False, maze_size=maze_size)
+    env = VecEnv(count, capture_layouts(game, seed))
+    actions = random_actions(np.random.default_rng(seed), count, 64)
+    start = time.perf_counter()
+    for step in range(steps):
+        done = env.step(actions[step % len(actions)])
+        if step % 64 == 63:
+            env.reset(done)
+    return count * steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--check', action='store_true', help="Compare against real Game objects")
+    parser.add_argument('--bench', action='store_true', help="Measure steps per second")
+    parser.add_argument('--count', type=int, default=65536, help="Sessions stepped together")
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--maze-size', type=int, default=None, help="Use a generated N x N maze for Zone 2")
+    args = parser.parse_args()
+
+    ok = True
+    log = sys.stdout  # The game prints debug output every second; keep ours readable
+    if args.check or not args.bench:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            ok = check(16, 3000, args.seed, args.maze_size, log)
+    if args.bench or not args.check:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            rate = bench(args.count, args.steps, args.seed, args.maze_size)
+        print(f"{args.count} sessions: {rate / 1e6:.2f} M steps/s")
+    pygame.quit()
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Animated water for the riverbank, scrolled from one precomputed texture.
+
+The texture is tileable noise made once with NumPy: white noise is
+low-passed in the frequency domain, so it wraps at the tile edges, then
+folded into bright ridges and run through a blue colour ramp. Each river
+builds one cached surface from it, tiled to cover the river plus one
+tile of scroll room. The river shape, minus the rocks and goal drawn over
+it, is cut into disjoint rects once. Animating is one area blit per rect
+from a window of that surface that moves with time; no pixels are
+recomputed.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+TILE = 128  # Texture period in pixels
+FLOW = (0.006, 0.03)  # Scroll speed in pixels per millisecond (the river runs downhill)
+# Colour ramp stops: noise value -> RGB; the middle matches the old flat river
+RAMP = (
+    (0.0, (0, 80, 175)),
+    (0.5, (0, 100, 200)),
+    (0.8, (30, 130, 220)),
+    (1.0, (140, 200, 245)),
+)
+
+_tile: Optional[pygame.Surface] = None
+
+
+def water_tile(size: int = TILE) -> pygame.Surface:
+    """Tileable size x size water texture, made on first use"""
+    global _tile
+    if _tile is not None and _tile.get_width() == size:
+        return _tile
+    rng = np.random.default_rng(0)
+    # Low-pass white noise in the frequency domain; the inverse FFT is periodic
+    spectrum = np.fft.fft2(rng.standard_normal((size, size)))
+    fy = np.fft.fftfreq(size)[:, None]
+    fx = np.fft.fftfreq(size)[None, :]
+    frequency = np.hypot(fx, fy * 1.6)  # Stretch the ripples across the flow
+    spectrum *= np.exp(-(frequency * size / 6) ** 2)
+    noise = np.fft.ifft2(spectrum).real
+    noise = (noise - noise.min()) / np.ptp(noise)
+    ridges = 1 - np.abs(2 * noise - 1)  # Bright lines where the noise crosses the middle
+    stops = np.array([stop for stop, _ in RAMP])
+    colors = np.array([color for _, color in RAMP], dtype=np.float64)
+    rgb = np.stack([np.interp(ridges ** 6, stops, colors[:, c]) for c in range(3)], axis=-1)
+    _tile = pygame.surfarray.make_surface(rgb.astype(np.uint8).transpose(1, 0, 2))
+    return _tile
+
+
+def cut(shape: List[pygame.Rect], holes: List[pygame.Rect]) -> List[pygame.Rect]:
+    """Disjoint rects covering the union of shape minus the holes"""
+    xs = sorted({x for r in shape + holes for x in (r.left, r.right)})
+    ys = sorted({y for r in shape + holes for y in (r.top, r.bottom)})
+    rects = []
+    open_runs = {}  # (left, right) -> rect still growing downward
+    for top, bottom in zip(ys, ys[1:]):
+        # Runs of covered cells across this band
+        runs = []
+        for left, right in zip(xs, xs[1:]):
+            cell = pygame.Rect(left, top, right - left, bottom - top)
+            covered = cell.collidelist(shape) != -1 and cell.collidelist(holes) == -1
+            if covered and runs and runs[-1][1] == left:
+                runs[-1] = (runs[-1][0], right)
+            elif covered:
+                runs.append((left, right))
+        # Extend the rects from the band above that span exactly the same run
+        growing = {}
+        for run in runs:
+            rect = open_runs.pop(run, None)
+            if rect is None:
+                rect = pygame.Rect(run[0], top, run[1] - run[0], 0)
+                rects.append(rect)
+            rect.height = bottom - rect.top
+            growing[run] = rect
+        open_runs = growing
+    return rects
+
+
+class Water:
+    def __init__(self, river: List[pygame.Rect], holes: List[pygame.Rect], tile_size: int = TILE):
+        self.rects = cut(river, holes)
+        self.tile_size = tile_size
+        self.bounds = self.rects[0].unionall(self.rects) if self.rects else pygame.Rect(0, 0, 0, 0)
+        tile = water_tile(tile_size)
+        # Room for any window of the river's size at any scroll offset
+        self.surface = pygame.Surface((self.bounds.width + tile_size, self.bounds.height + tile_size))
+        for y in range(0, self.surface.get_height(), tile_size):
+            for x in range(0, self.surface.get_width(), tile_size):
+                self.surface.blit(tile, (x, y))
+
+    def scroll(self, ticks: int) -> Tuple[int, int]:
+        """Texture offset at a time; a window further up shows the water further down"""
+        size = self.tile_size
+        return int(ticks * -FLOW[0]) % size, int(ticks * -FLOW[1]) % size
+
+    def draw(self, renderer, viewport: pygame.Rect, ticks: int) -> None:
+        ox, oy = self.scroll(ticks)
+        # Offsets are relative to the river's bounds, so the pattern runs on across rects
+        ox -= self.bounds.x
+        oy -= self.bounds.y
+        for rect in self.rects:
+            if viewport.colliderect(rect):
+                renderer.blit_area(self.surface, rect.topleft, (rect.x + ox, rect.y + oy, rect.width, rect.height))